@@ -0,0 +1,82 @@
+"""
+Measure the per-save cost of ``Slides.save``.
+
+Compares the old behaviour (a fresh Jinja2 environment and template compile on
+every save) against the shared :class:`pyslides.Renderer`, with and without a
+warm on-disk bytecode cache.
+
+Run from the repository root::
+
+    python benchmarks/bench_save.py --saves 200 --slides 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pyslides
+from pyslides import Renderer
+
+
+def build_deck(n_slides):
+    slides = pyslides.Slides(title="Benchmark deck")
+    slides.add_slide(layout='title', title="Benchmark", subtitle="per-save cost")
+    for i in range(n_slides - 1):
+        slides.add_slide(title=f"Slide {i}", content=f"<p>Content {i}</p>", notes="notes")
+    return slides
+
+
+def render_with(renderer, slides):
+    """The deck's document, rendering every slide (no fragment cache)"""
+    return renderer.render('base.html', **slides._template_context(slides._render_sections(renderer)))
+
+
+def legacy_render(slides):
+    """Rendering as ``save`` did before the shared renderer: a fresh environment per save"""
+    return render_with(Renderer(), slides)
+
+
+def timed(label, func, saves):
+    start = time.perf_counter()
+    for _ in range(saves):
+        func()
+    per_save = (time.perf_counter() - start) / saves * 1e3
+    print(f"{label:<40} {per_save:8.3f} ms/save")
+    return per_save
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--saves', type=int, default=200)
+    parser.add_argument('--slides', type=int, default=20)
+    args = parser.parse_args()
+
+    slides = build_deck(args.slides)
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'deck.html')
+
+        def save_with(renderer):
+            html = render_with(renderer, slides)
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write(html)
+
+        def save_legacy():
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write(legacy_render(slides))
+
+        bytecode_dir = os.path.join(tmp, 'bytecode')
+        Renderer(bytecode_cache_dir=bytecode_dir).get_template()
+
+        before = timed("fresh environment per save (before)", save_legacy, args.saves)
+        after = timed("shared renderer (after)", lambda: save_with(pyslides.get_renderer()),
+                      args.saves)
+        timed("cold renderer + warm bytecode cache",
+              lambda: save_with(Renderer(bytecode_cache_dir=bytecode_dir)), args.saves)
+        print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+"""
+Benchmark suite for deck building, figure conversion and rendering at scale.
+
+Every benchmark reports one or more metrics where lower is better (seconds,
+microseconds per slide, bytes). Results are written as JSON and two result
+files, or two git revisions, can be compared to flag regressions.
+
+Run from the repository root::
+
+    python benchmarks/suite.py run --json head.json
+    python benchmarks/suite.py run --quick --filter save
+    python benchmarks/suite.py compare base.json head.json --threshold 0.1
+    python benchmarks/suite.py compare-commits main HEAD --quick
+
+A benchmark may also assert a relation between its metrics (e.g. that a cache
+key is much cheaper than the work it saves); a failed check is reported and
+makes ``run`` exit with status 1.
+
+Only the API available since the first release (``Slides``, ``add_slide``,
+``save``, ``_convert_figure``) is used, so older commits can be measured with
+the current suite. Caches are switched off (``PYSLIDES_NO_CACHE=1``) so every
+run measures real work.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+BENCHMARKS = []
+
+
+def benchmark(name, params=(None,), quick=None):
+    """Register ``func(param) -> {metric: value}``; ``quick`` limits params in --quick runs"""
+    def register(func):
+        BENCHMARKS.append((name, func, tuple(params), tuple(quick if quick is not None else params)))
+        return func
+    return register
+
+
+def median_time(func, setup=None, repeat=5):
+    """Median wall time of ``func(setup())`` over ``repeat`` runs, after one untimed warm-up"""
+    times = []
+    for _ in range(repeat + 1):
+        state = setup() if setup is not None else None
+        start = time.perf_counter()
+        func(state) if setup is not None else func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times[1:])
+
+
+def peak_memory(func, state=None):
+    """Peak traced allocation (bytes) while ``func`` runs"""
+    tracemalloc.start()
+    try:
+        func(state) if state is not None else func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# Benchmarks
+
+@benchmark('import')
+def bench_import(_):
+    probe = "import time; t = time.perf_counter(); import pyslides; print(time.perf_counter() - t)"
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    runs = [float(subprocess.run([sys.executable, '-c', probe], env=env, check=True,
+                                 capture_output=True, text=True).stdout)
+            for _ in range(REPEAT)]
+    return {'seconds': statistics.median(runs)}
+
+
+@benchmark('add_slide', params=(1000, 10000), quick=(1000,))
+def bench_add_slide(n):
+    import pyslides
+
+    def build():
+        slides = pyslides.Slides(title='bench')
+        for i in range(n):
+            slides.add_slide(title=f'Slide {i}', content=f'<p>Content {i}</p>', notes='notes')
+        return slides
+    seconds = median_time(build, repeat=REPEAT)
+    return {'us_per_slide': seconds / n * 1e6, 'peak_bytes': peak_memory(build)}
+
+
+def _matplotlib_figure(points):
+    import matplotlib
+    matplotlib.use('Agg')
+    import numpy as np
+    from matplotlib.figure import Figure
+    figure = Figure(figsize=(8, 4.5))
+    axes = figure.add_subplot()
+    x = np.linspace(0, 100, points)
+    axes.plot(x, np.sin(x) + np.random.default_rng(0).normal(0, 0.1, points))
+    return figure
+
+
+def _plotly_figure(points):
+    import numpy as np
+    import plotly.graph_objects as go
+    x = np.arange(points)
+    return go.Figure(go.Scatter(x=x, y=np.cumsum(np.random.default_rng(0).normal(size=points))))
+
+
+@benchmark('convert_matplotlib', params=(1_000, 100_000), quick=(1_000,))
+def bench_convert_matplotlib(points):
+    import pyslides
+    slides = pyslides.Slides()
+    figure = _matplotlib_figure(points)
+    seconds = median_time(lambda: slides._convert_figure(figure), repeat=REPEAT)
+    return {'seconds': seconds, 'bytes': len(slides._convert_figure(figure))}
+
+
+@benchmark('convert_plotly', params=(1_000, 100_000), quick=(1_000,))
+def bench_convert_plotly(points):
+    import pyslides
+    slides = pyslides.Slides()
+    figure = _plotly_figure(points)
+    seconds = median_time(lambda: slides._convert_figure(figure), repeat=REPEAT)
+    return {'seconds': seconds, 'bytes': len(slides._convert_figure(figure))}
+
+
+def _matplotlib_artists_figure(kind):
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    figure = Figure(figsize=(8, 4.5))
+    axes = figure.add_subplot()
+    if kind == 'bars':
+        axes.bar(range(300), range(300))
+    else:
+        for i in range(200):
+            axes.text(i / 200, i / 200, f'label {i}')
+    return figure
+
+
+@benchmark('figure_cache_key', params=('bars', 'texts'))
+def bench_figure_cache_key(kind):
+    from pyslides.pyslides import MatplotlibFigure
+    figure = _matplotlib_artists_figure(kind)
+    if not hasattr(MatplotlibFigure, 'cache_key'):
+        raise ImportError('no figure cache in this revision')
+    key = median_time(lambda: MatplotlibFigure(figure).cache_key(), repeat=REPEAT)
+    convert = median_time(lambda: MatplotlibFigure(figure).to_html(), repeat=REPEAT)
+    # key_ratio is the share of a conversion a cache hit still costs
+    return {'key_seconds': key, 'convert_seconds': convert, 'key_ratio': key / convert}
+
+
+@benchmark('save', params=(10, 100, 1000, 10000), quick=(10, 100, 1000))
+def bench_save(n):
+    import pyslides
+
+    # Every tenth slide embeds a pre-rendered chart payload, so the numbers
+    # measure rendering and writing rather than figure conversion
+    chart = '<div class="chart">' + ','.join(str(i) for i in range(2000)) + '</div>'
+
+    def build():
+        slides = pyslides.Slides(title='bench')
+        for i in range(n):
+            slides.add_slide(title=f'Slide {i}', content=chart if i % 10 == 0 else f'<p>Content {i}</p>',
+                             notes='notes')
+        return slides
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'deck.html')
+
+        def save(slides):
+            with _quiet():
+                slides.save(output)
+        seconds = median_time(save, setup=build, repeat=REPEAT)
+        peak = peak_memory(save, build())
+        size = os.path.getsize(output)
+    return {'seconds': seconds, 'bytes_per_slide': size / n, 'peak_bytes': peak}
+
+
+class _quiet:
+    """Silence the progress messages ``save`` prints"""
+
+    def __enter__(self):
+        self._stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+
+    def __exit__(self, *exc):
+        sys.stdout.close()
+        sys.stdout = self._stdout
+
+
+# Running and comparing
+
+REPEAT = 5
+
+
+def git_commit(root):
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    global REPEAT
+    REPEAT = min(args.repeat, 2) if args.quick else args.repeat
+    sys.path.insert(0, ROOT)
+    os.environ['PYSLIDES_NO_CACHE'] = '1'
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+
+    results, failures = {}, []
+    for name, func, params, quick in BENCHMARKS:
+        for param in (quick if args.quick else params):
+            label = name if param is None else f'{name}[{param}]'
+            if args.filter and not any(pattern in label for pattern in args.filter):
+                continue
+            try:
+                metrics = func(param)
+            except ImportError as error:
+                print(f"{label:<28} skipped ({error})")
+                continue
+            except AssertionError as error:
+                print(f"{label:<28} FAILED ({error})")
+                failures.append(label)
+                continue
+            for metric, value in metrics.items():
+                results[f'{label}.{metric}'] = value
+            print(f"{label:<28} " + '  '.join(f'{metric}={value:.4g}' for metric, value in metrics.items()))
+
+    report = dict(meta=dict(commit=git_commit(ROOT), python=platform.python_version(),
+                            machine=platform.machine(), quick=args.quick,
+                            timestamp=datetime.datetime.now().isoformat(timespec='seconds')),
+                  results=results, failures=failures)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Results written to: {args.json}")
+    return 1 if failures else 0
+
+
+def compare_results(base, head, threshold):
+    """Print a metric-by-metric comparison; return the number of regressions"""
+    base, head = base['results'], head['results']
+    regressions = 0
+    print(f"{'metric':<44} {'base':>12} {'head':>12} {'ratio':>8}")
+    for key in sorted(set(base) & set(head)):
+        ratio = head[key] / base[key] if base[key] else float('inf') if head[key] else 1.0
+        if ratio > 1 + threshold:
+            flag, regressions = '  REGRESSION', regressions + 1
+        elif ratio < 1 / (1 + threshold):
+            flag = '  improved'
+        else:
+            flag = ''
+        print(f"{key:<44} {base[key]:>12.4g} {head[key]:>12.4g} {ratio:>7.2f}x{flag}")
+    for key in sorted(set(base) ^ set(head)):
+        print(f"{key:<44} only in {'base' if key in base else 'head'}")
+    print(f"{regressions} regression(s) above {threshold:.0%}")
+    return regressions
+
+
+def compare(args):
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.head, encoding='utf-8') as f:
+        head = json.load(f)
+    return 1 if compare_results(base, head, args.threshold) else 0
+
+
+def compare_commits(args):
+    """Run this suite against two revisions, each checked out in a temporary worktree"""
+    reports = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rev in (args.base, args.head):
+            worktree = os.path.join(tmp, f'tree-{len(reports)}')
+            subprocess.run(['git', 'worktree', 'add', '--detach', worktree, rev],
+                           cwd=ROOT, check=True, capture_output=True)
+            try:
+                suite = os.path.join(worktree, 'benchmarks', 'suite.py')
+                os.makedirs(os.path.dirname(suite), exist_ok=True)
+                shutil.copyfile(os.path.abspath(__file__), suite)
+                output = os.path.join(tmp, f'{len(reports)}.json')
+                command = [sys.executable, suite, 'run', '--json', output, '--repeat', str(args.repeat)]
+                command += ['--quick'] if args.quick else []
+                for pattern in args.filter or []:
+                    command += ['--filter', pattern]
+                print(f"== {rev}")
+                # Exit status 1 only reports failed checks; results are still written
+                if subprocess.run(command).returncode not in (0, 1):
+                    raise subprocess.CalledProcessError(1, command)
+                with open(output, encoding='utf-8') as f:
+                    reports.append(json.load(f))
+            finally:
+                subprocess.run(['git', 'worktree', 'remove', '--force', worktree],
+                               cwd=ROOT, check=False, capture_output=True)
+    print(f"\n== {args.base} -> {args.head}")
+    return 1 if compare_results(reports[0], reports[1], args.threshold) else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    def common(command):
+        command.add_argument('--quick', action='store_true', help='smaller sizes and fewer repeats')
+        command.add_argument('--repeat', type=int, default=5, help='timed repeats per benchmark')
+        command.add_argument('--filter', action='append', help='only benchmarks containing this text')
+
+    run_parser = commands.add_parser('run', help='run the suite')
+    common(run_parser)
+    run_parser.add_argument('--json', help='write results to this file')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('head')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='relative change reported as a regression (default: 0.1)')
+    compare_parser.set_defaults(func=compare)
+
+    commits_parser = commands.add_parser('compare-commits', help='run the suite on two git revisions')
+    commits_parser.add_argument('base')
+    commits_parser.add_argument('head')
+    commits_parser.add_argument('--threshold', type=float, default=0.1)
+    common(commits_parser)
+    commits_parser.set_defaults(func=compare_commits)
+
+    args = parser.parse_args(argv)
+    result = args.func(args)
+    return result if isinstance(result, int) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,14 @@
 """Dynamically create interactive presentations from python directly!"""
-from pyslides.pyslides import Slides
+from pyslides.pyslides import (Slides, Renderer, get_renderer, set_renderer, LazyFigure,
+                               FigureConversionError, PlotlyFigure, MatplotlibFigure,
+                               ImageOptions, PlotlyOptions, register_figure_type)
+from pyslides.cache import (FigureCache, FragmentCache, get_figure_cache, set_figure_cache,
+                            get_fragment_cache, set_fragment_cache, BackgroundCache,
+                            get_background_cache, set_background_cache)
+from pyslides.backgrounds import BackgroundOptions
+from pyslides.batch import DeckSpec, BuildResult, build_many
+from pyslides.slide import Slide, TitleSlide, TwoColumnSlide, ImageLeftSlide, ImageRightSlide
+from pyslides.stats import DeckStats, SizeBudget, BudgetExceededError
+from pyslides.trace import BuildTrace, trace_build
 
 __version__ = '0.0.1'
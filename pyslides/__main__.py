@@ -0,0 +1,6 @@
+"""Allow ``python -m pyslides``"""
+import sys
+
+from pyslides.cli import main
+
+sys.exit(main())
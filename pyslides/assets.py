@@ -0,0 +1,252 @@
+"""
+Asset handling for saved decks.
+
+Figures are converted to self-contained HTML with images embedded as base64
+data URIs. In ``sidecar`` mode those images are written next to the deck
+instead, with content-hash filenames, and referenced by URL.
+
+Text output can also be precompressed for static hosting (``deck.html.gz``,
+``deck.html.br``), and large figure payloads can be stored gzip-compressed
+inside the HTML and expanded by the browser.
+"""
+
+######################
+# Standard libraries #
+######################
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pathlib import Path
+import base64
+import concurrent.futures
+import gzip
+import hashlib
+import io
+import os
+import re
+import uuid
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+
+# The payload stops at the first character outside base64 (the closing quote
+# or bracket); line-wrapped base64 may only break with bare newlines
+DATA_URI = re.compile(r'data:(image/[\w.+-]+);base64,([A-Za-z0-9+/=]+(?:\n[A-Za-z0-9+/=]+)*)')
+
+EXTENSIONS = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/webp': 'webp',
+    'image/gif': 'gif',
+    'image/svg+xml': 'svg',
+}
+
+# Sidecar files worth precompressing (images are compressed already)
+COMPRESSIBLE = ('html', 'js', 'css', 'svg', 'json')
+
+# Precompression runs once per build, so favour ratio over speed; brotli's
+# maximum quality (11) is several times slower than 9 for ~3% less size
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+
+def precompress_formats(precompress: Any) -> Tuple[str, ...]:
+    """
+    Normalise a ``precompress`` argument to a tuple of formats.
+
+    ``True`` means every available format. 'br' is skipped with a warning when
+    the ``brotli`` package is not installed.
+    """
+    if not precompress:
+        return ()
+    formats = ('gzip', 'br') if precompress is True else tuple(
+        [precompress] if isinstance(precompress, str) else precompress)
+    for name in formats:
+        if name not in ('gzip', 'br'):
+            raise ValueError(f"Unknown precompression format '{name}'. Options: 'gzip', 'br'")
+    if 'br' in formats and not HAS_BROTLI:
+        if precompress is not True:
+            print("Warning: brotli is not installed; skipping .br output. Install with: pip install brotli")
+        formats = tuple(name for name in formats if name != 'br')
+    return formats
+
+
+SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+
+class CompressedWriter:
+    """
+    Binary writer that writes the data it receives to ``path`` and, on the
+    fly, a compressed copy per format (``path.gz``, ``path.br``).
+
+    Every file is written under a temporary name and moved into place by
+    :meth:`commit`; :meth:`discard` removes them instead.
+    """
+
+    def __init__(self, path: str, formats: Iterable[str] = ()):
+        self.paths = [Path(path)] + [Path(str(path) + SUFFIXES[name]) for name in formats]
+        # Unique names: concurrent saves to the same path must not share partial files
+        suffix = uuid.uuid4().hex
+        self._partials = [target.with_name(f'{target.name}.{suffix}.part') for target in self.paths]
+        self._files = [open(partial, 'wb') for partial in self._partials]
+        self._encoders: List[Any] = [None]
+        for name, file in zip(formats, self._files[1:]):
+            if name == 'gzip':
+                self._encoders.append(gzip.GzipFile(fileobj=file, mode='wb', compresslevel=GZIP_LEVEL, mtime=0))
+            else:
+                self._encoders.append(brotli.Compressor(quality=BROTLI_QUALITY))
+
+    def write(self, data: bytes):
+        self._files[0].write(data)
+        for encoder, file in zip(self._encoders[1:], self._files[1:]):
+            if isinstance(encoder, gzip.GzipFile):
+                encoder.write(data)
+            else:
+                file.write(encoder.process(data))
+
+    def _close(self):
+        for encoder, file in zip(self._encoders, self._files):
+            if isinstance(encoder, gzip.GzipFile):
+                encoder.close()
+            elif encoder is not None:
+                file.write(encoder.finish())
+            file.close()
+
+    def commit(self):
+        """Finish the compressed streams and move every file into place"""
+        self._close()
+        for partial, target in zip(self._partials, self.paths):
+            os.replace(partial, target)
+
+    def discard(self):
+        """Close and delete the partial files"""
+        for file in self._files:
+            file.close()
+        for partial in self._partials:
+            if partial.exists():
+                partial.unlink()
+
+
+def pack_payload(html: str, min_bytes: int = 4096, max_ratio: float = 0.8,
+                 keep_images: bool = False) -> Optional[str]:
+    """
+    Base64 of the gzip-compressed ``html``, or None when packing does not pay.
+
+    Payloads under ``min_bytes`` and payloads that do not shrink below
+    ``max_ratio`` of their size (base64 PNG/JPEG/WebP images, which are
+    compressed already) are left alone; Matplotlib SVG images pack to about
+    half. With ``keep_images`` (sidecar mode), payloads with embedded data
+    URIs are not packed, so the images can still be moved out.
+    """
+    if len(html) < min_bytes or (keep_images and 'data:image/' in html):
+        return None
+    packed = base64.b64encode(_gzip(html.encode('utf-8'))).decode()
+    return packed if len(packed) < len(html) * max_ratio else None
+
+
+class AssetWriter:
+    """
+    Write embedded images to a directory and rewrite HTML to reference them.
+
+    Files are named after a hash of their content, so an image used on many
+    slides (or in many saves) is stored once. Writes happen on a thread pool
+    while the deck keeps rendering; :meth:`close` waits for them.
+
+    Parameters
+    ----------
+    directory : str
+        Directory the image files are written to (created if missing)
+    url_prefix : str
+        Prefix of the ``src`` URLs in the rewritten HTML, usually the path of
+        ``directory`` relative to the HTML file
+    workers : int, optional
+        Number of writer threads
+    precompress : tuple of str, optional
+        Also write ``.gz``/``.br`` copies of text files (see
+        :func:`precompress_formats`)
+    """
+
+    def __init__(self, directory: str, url_prefix: str, workers: int = 4,
+                 precompress: Iterable[str] = ()):
+        self.directory = Path(directory)
+        self.url_prefix = url_prefix.rstrip('/')
+        self.precompress = tuple(precompress)
+        self.written = {}
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        self._futures = []
+
+    def externalize(self, html: str) -> str:
+        """Replace every base64 image data URI in ``html`` by a file URL"""
+        if 'base64,' not in html:
+            return html
+        return DATA_URI.sub(self._replace, html)
+
+    def _replace(self, match) -> str:
+        mime, payload = match.group(1), match.group(2)
+        return self.add(base64.b64decode(payload), EXTENSIONS.get(mime, 'bin'))
+
+    def add(self, data: bytes, extension: str, stem: str = '') -> str:
+        """Queue ``data`` for writing under its content-hash name; return its URL"""
+        digest = hashlib.sha256(data).hexdigest()[:20]
+        name = f"{stem}.{digest}.{extension}" if stem else f"{digest}.{extension}"
+        if name not in self.written:
+            self.written[name] = len(data)
+            formats = self.precompress if extension in COMPRESSIBLE else ()
+            self._futures.append(self._pool.submit(_write_once, self.directory / name, data, formats))
+        return f"{self.url_prefix}/{name}"
+
+    def close(self) -> Dict[str, int]:
+        """Wait for pending writes; return the files written with their sizes"""
+        try:
+            for future in self._futures:
+                future.result()
+        finally:
+            self._pool.shutdown()
+        return self.written
+
+
+def _gzip(data: bytes) -> bytes:
+    """Reproducible gzip (no timestamp in the header)"""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=GZIP_LEVEL, mtime=0) as f:
+        f.write(data)
+    return buffer.getvalue()
+
+
+def _compress(data: bytes, name: str) -> bytes:
+    if name == 'gzip':
+        return _gzip(data)
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+def _atomic_write(path: Path, data: bytes):
+    partial = path.with_name(f'{path.name}.{uuid.uuid4().hex}.part')
+    partial.write_bytes(data)
+    os.replace(partial, path)
+
+
+def _write_once(path: Path, data: bytes, formats: Iterable[str] = ()):
+    """Write ``data`` (and compressed copies) unless the content-addressed file exists"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Copies first: once the plain file exists, its copies are complete
+    for name in formats:
+        target = Path(str(path) + SUFFIXES[name])
+        if not target.exists():
+            _atomic_write(target, _compress(data, name))
+    if not path.exists():
+        _atomic_write(path, data)
+
+
+def default_assets_dir(output_path: str) -> Path:
+    """``deck.html`` keeps its images in ``deck_assets/``"""
+    output = Path(output_path)
+    return output.with_name(f'{output.stem}_assets')
+
+
+def relative_url(target: str, start: Optional[str]) -> str:
+    """URL of ``target`` relative to the directory ``start`` (or as given)"""
+    if start is None:
+        return Path(target).as_posix()
+    return Path(os.path.relpath(str(target), str(start))).as_posix()
@@ -0,0 +1,157 @@
+"""
+Background image optimisation.
+
+Slide backgrounds pointing at local image files can be resized to the size
+they are shown at (the deck's ``width``/``height``) and re-encoded, usually
+to WebP, before they are embedded. Results are cached on disk under a hash
+of the source image and the target settings, and every distinct image is
+stored once in the deck, however many slides use it.
+"""
+
+######################
+# Standard libraries #
+######################
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import hashlib
+import io
+import math
+
+from pyslides.cache import BackgroundCache, stable_hash
+
+
+MIME_TYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+
+EXTENSIONS = {'image/webp': 'webp', 'image/jpeg': 'jpg', 'image/png': 'png', 'image/gif': 'gif'}
+
+# Raster files worth optimising; anything else (SVG, video, ...) is left alone
+SOURCE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff')
+
+
+@dataclass
+class BackgroundOptions:
+    """
+    How local background images are optimised.
+
+    Parameters
+    ----------
+    format : {'webp', 'jpeg', 'png'}, optional
+        Output encoding. WebP keeps transparency and is much smaller than PNG
+        or JPEG for photos. Default: 'webp'
+    quality : int, optional
+        Encoder quality for WebP and JPEG. Default: 80
+    width, height : int, optional
+        Size the image must cover. Defaults to the deck's ``width``/``height``
+        config. Images are only ever scaled down, keeping their aspect ratio.
+    """
+    format: str = 'webp'
+    quality: int = 80
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+    def __post_init__(self):
+        if self.format not in MIME_TYPES:
+            raise ValueError(f"Unsupported background format '{self.format}'. Options: {list(MIME_TYPES)}")
+
+    @property
+    def mime(self) -> str:
+        return MIME_TYPES[self.format]
+
+
+def local_image(background: str, base_dir: Optional[Path] = None) -> Optional[Path]:
+    """
+    The local raster image a ``background`` value refers to, or None (URLs,
+    colours, data URIs, SVG and other non-raster files). Relative paths are
+    resolved from ``base_dir`` (the saved HTML's directory), as the browser
+    does; default: the working directory.
+    """
+    if not background or background.startswith(('data:', '#', 'rgb', 'hsl')) or '://' in background:
+        return None
+    path = Path(base_dir or '') / background
+    return path if path.suffix.lower() in SOURCE_SUFFIXES and path.is_file() else None
+
+
+def _encode(data: bytes, width: int, height: int, options: BackgroundOptions) -> Optional[Tuple[bytes, str]]:
+    """
+    Scale ``data`` down to cover ``width`` x ``height`` and re-encode it.
+    None when PIL cannot read it or it is animated (it is then used as it is).
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        source = Image.open(io.BytesIO(data))
+    except UnidentifiedImageError:
+        return None
+    with source:
+        if getattr(source, 'is_animated', False):
+            return None
+        source_mime = Image.MIME.get(source.format)
+        image = ImageOps.exif_transpose(source)
+        scale = max(width / image.width, height / image.height)
+        resized = scale < 1
+        if resized:
+            size = (math.ceil(image.width * scale), math.ceil(image.height * scale))
+            image = image.resize(size, Image.LANCZOS)
+        if options.format == 'jpeg' or (options.format == 'webp' and image.mode not in ('RGB', 'RGBA')):
+            image = image.convert('RGBA' if options.format == 'webp' and 'A' in image.getbands() else 'RGB')
+        buffer = io.BytesIO()
+        if options.format == 'png':
+            image.save(buffer, 'PNG', optimize=True)
+        elif options.format == 'webp':
+            image.save(buffer, 'WEBP', quality=options.quality, method=4)
+        else:
+            image.save(buffer, 'JPEG', quality=options.quality, optimize=True, progressive=True)
+    optimised = buffer.getvalue()
+    # A small, already well-compressed source shown at its own size stays as it is
+    if not resized and source_mime in EXTENSIONS and len(data) <= len(optimised):
+        return data, source_mime
+    return optimised, options.mime
+
+
+def optimize_background(path: Path, width: int, height: int, options: BackgroundOptions,
+                        cache: Optional[BackgroundCache] = None) -> Optional[Tuple[bytes, str]]:
+    """
+    Optimised bytes and MIME type of the image at ``path`` (see :class:`BackgroundOptions`),
+    or None for files that are not optimised (unreadable or animated images).
+
+    With a cache, the result is looked up under a hash of the source bytes
+    and the settings, and only computed on a miss.
+    """
+    data = Path(path).read_bytes()
+    key = stable_hash('background', hashlib.sha256(data).hexdigest(), f'{width}x{height}',
+                      options.format, str(options.quality))
+    if cache is not None:
+        cached = cache.get_bytes(key)
+        if cached is not None:
+            mime, _, image = cached.partition(b'\n')
+            return (image, mime.decode()) if mime else None
+    result = _encode(data, width, height, options)
+    if cache is not None:
+        # An empty entry remembers files that are passed through
+        cache.put_bytes(key, b'\n' if result is None else result[1].encode() + b'\n' + result[0])
+    return result
+
+
+def optimize_backgrounds(backgrounds, width: int, height: int, options: BackgroundOptions,
+                         cache: Optional[BackgroundCache] = None,
+                         base_dir: Optional[Path] = None) -> Dict[str, Tuple[str, bytes, str]]:
+    """
+    Optimise the local images among ``backgrounds`` (slide background values),
+    with relative paths resolved from ``base_dir`` (see :func:`local_image`).
+
+    Returns ``{background: (key, data, mime)}``; ``key`` is a hash of the
+    optimised image, so identical images share it.
+    """
+    images = {}
+    for background in backgrounds:
+        if background in images:
+            continue
+        path = local_image(background, base_dir)
+        if path is None:
+            continue
+        result = optimize_background(path, width, height, options, cache)
+        if result is not None:
+            data, mime = result
+            images[background] = (hashlib.sha256(data).hexdigest()[:16], data, mime)
+    return images
@@ -0,0 +1,170 @@
+"""
+Build many independent decks concurrently.
+
+Every deck is described by a :class:`DeckSpec`: a function that builds the
+:class:`~pyslides.Slides` and the path to save it to. :func:`build_many` runs
+the specs on a worker pool; workers share the compiled template through the
+on-disk bytecode cache and, for decks built with ``figure_cache=True``,
+converted figures through the shared figure cache.
+"""
+
+######################
+# Standard libraries #
+######################
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+import concurrent.futures
+import importlib.util
+import os
+import sys
+import time
+import traceback
+
+from pyslides.cache import default_cache_dir, stable_hash
+from pyslides.pyslides import Renderer, set_renderer
+
+
+@dataclass
+class DeckSpec:
+    """
+    One deck of a batch.
+
+    ``build(*args, **kwargs)`` must return the :class:`~pyslides.Slides` to
+    save to ``output``; ``save_options`` are passed on to ``save``. With a
+    process pool, ``build`` and its arguments must be picklable (a function
+    defined at module level).
+
+    Examples
+    --------
+    >>> DeckSpec("acme.html", build_customer_deck, args=("ACME",))
+    """
+    output: str
+    build: Callable[..., Any]
+    args: tuple = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    save_options: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class BuildResult:
+    """Outcome and timings of one deck of a batch"""
+    output: str
+    build_seconds: float = 0.0
+    save_seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def seconds(self) -> float:
+        return self.build_seconds + self.save_seconds
+
+
+def template_cache_dir() -> str:
+    """Bytecode cache shared by batch workers"""
+    return str(default_cache_dir() / 'templates')
+
+
+def _build_one(spec: DeckSpec) -> BuildResult:
+    """Build and save one deck, capturing failures instead of raising"""
+    result = BuildResult(output=str(spec.output))
+    start = time.perf_counter()
+    try:
+        slides = spec.build(*spec.args, **spec.kwargs)
+        result.build_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        slides.save(spec.output, **spec.save_options)
+        result.save_seconds = time.perf_counter() - start
+    except Exception:
+        result.error = traceback.format_exc()
+    return result
+
+
+def _init_worker(scripts: List[str]):
+    """Pool initializer: share compiled templates and import the build scripts"""
+    set_renderer(Renderer(bytecode_cache_dir=template_cache_dir()))
+    for script in scripts:
+        load_script(script)
+
+
+def load_script(path: str):
+    """
+    Import a build script as a module.
+
+    The module is registered in ``sys.modules`` under a name derived from its
+    path, so functions defined in it can be pickled to pool workers.
+    """
+    path = os.path.abspath(path)
+    name = f"pyslides_script_{stable_hash(path)[:12]}"
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+def build_many(
+    specs: Iterable[DeckSpec],
+    workers: Optional[int] = None,
+    executor: Union[str, concurrent.futures.Executor] = 'process',
+    scripts: Iterable[str] = ()
+) -> List[BuildResult]:
+    """
+    Build and save many decks concurrently.
+
+    Parameters
+    ----------
+    specs : iterable of DeckSpec
+        Decks to build
+    workers : int, optional
+        Pool size. ``None`` or 1 builds the decks one after another.
+    executor : {'process', 'thread'} or concurrent.futures.Executor, optional
+        Kind of pool to start, or an existing executor to submit to.
+        Default: 'process'
+    scripts : iterable of str, optional
+        Build scripts whose functions the specs refer to; imported in every
+        worker process before it builds (see :func:`load_script`).
+
+    Returns
+    -------
+    list of BuildResult
+        One result per spec, in order. Failed decks carry the formatted
+        traceback in ``error`` and do not stop the rest of the batch.
+
+    Examples
+    --------
+    >>> specs = [DeckSpec(f"{c}.html", build_customer_deck, args=(c,)) for c in customers]
+    >>> for result in build_many(specs, workers=8):
+    ...     print(result.output, result.seconds, result.ok)
+    """
+    specs = list(specs)
+    scripts = list(scripts)
+
+    # Compile once up front so every worker loads the templates from bytecode
+    renderer = Renderer(bytecode_cache_dir=template_cache_dir())
+    for name in ('base.html', 'slide.html'):
+        renderer.get_template(name)
+
+    if isinstance(executor, concurrent.futures.Executor):
+        return [future.result() for future in [executor.submit(_build_one, spec) for spec in specs]]
+
+    if not workers or workers <= 1 or len(specs) <= 1:
+        return [_build_one(spec) for spec in specs]
+
+    if executor == 'process':
+        pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(scripts,))
+    elif executor == 'thread':
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    else:
+        raise ValueError(f"Unknown executor '{executor}'. Options: 'process', 'thread'")
+    with pool:
+        return list(pool.map(_build_one, specs))
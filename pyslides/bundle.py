@@ -0,0 +1,222 @@
+"""
+Runtime assets (Reveal.js, its plugins, plotly.js, MathJax) for saved decks.
+
+Decks reference the runtime from CDNs by default. The ``inline`` and
+``sidecar`` bundle modes instead read it from a local vendor directory,
+filled once with ``pyslides vendor``, so building needs no network. Only
+the libraries and plugins a deck uses are included.
+"""
+
+######################
+# Standard libraries #
+######################
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set
+from pathlib import Path
+import os
+import re
+
+from pyslides.cache import default_cache_dir
+
+
+REVEAL_VERSION = '5.1.0'
+PLOTLY_VERSION = '2.35.2'
+MATHJAX_VERSION = '3'
+
+REVEAL_CDN = f'https://cdn.jsdelivr.net/npm/reveal.js@{REVEAL_VERSION}'
+MATHJAX_CDN = f'https://cdn.jsdelivr.net/npm/mathjax@{MATHJAX_VERSION}'
+
+THEMES = ['black', 'white', 'league', 'beige', 'sky',
+          'night', 'serif', 'simple', 'solarized', 'blood', 'moon']
+
+BUNDLE_MODES = ('cdn', 'inline', 'sidecar')
+
+
+@dataclass
+class RuntimeAsset:
+    """One stylesheet or script of the deck runtime"""
+    name: str
+    url: str
+    feature: str
+    placement: str = 'body'
+    plugin: Optional[str] = None
+
+    @property
+    def kind(self) -> str:
+        return 'css' if self.url.endswith('.css') else 'js'
+
+    @property
+    def vendor_path(self) -> str:
+        """Location inside the vendor directory (mirrors the CDN path)"""
+        return re.sub(r'^https://[^/]+/(npm/)?', '', self.url)
+
+
+def runtime_assets(theme: str, features: Iterable[str], offline: bool = False) -> List[RuntimeAsset]:
+    """
+    Runtime assets needed for ``features``, in load order.
+
+    Offline bundles use MathJax's SVG output, which needs no web fonts.
+    """
+    mathjax = 'tex-mml-svg.js' if offline else 'tex-mml-chtml.js'
+    catalogue = [
+        RuntimeAsset('reset', f'{REVEAL_CDN}/dist/reset.css', 'core', 'head'),
+        RuntimeAsset('reveal', f'{REVEAL_CDN}/dist/reveal.css', 'core', 'head'),
+        RuntimeAsset('theme', f'{REVEAL_CDN}/dist/theme/{theme}.css', 'core', 'head'),
+        RuntimeAsset('monokai', f'{REVEAL_CDN}/plugin/highlight/monokai.css', 'highlight', 'head'),
+        RuntimeAsset('plotly', f'https://cdn.plot.ly/plotly-{PLOTLY_VERSION}.min.js', 'plotly', 'head'),
+        RuntimeAsset('mathjax', f'{MATHJAX_CDN}/es5/{mathjax}', 'mathjax', 'head'),
+        RuntimeAsset('reveal', f'{REVEAL_CDN}/dist/reveal.js', 'core'),
+        RuntimeAsset('notes', f'{REVEAL_CDN}/plugin/notes/notes.js', 'notes', plugin='RevealNotes'),
+        RuntimeAsset('highlight', f'{REVEAL_CDN}/plugin/highlight/highlight.js', 'highlight',
+                     plugin='RevealHighlight'),
+        RuntimeAsset('zoom', f'{REVEAL_CDN}/plugin/zoom/zoom.js', 'zoom', plugin='RevealZoom'),
+        RuntimeAsset('search', f'{REVEAL_CDN}/plugin/search/search.js', 'search', plugin='RevealSearch'),
+    ]
+    features = set(features) | {'core'}
+    return [asset for asset in catalogue if asset.feature in features]
+
+
+# $...$ counts as TeX only without spaces inside the delimiters and no digit
+# after the closing one (as pandoc does), so "costs $5 and $10" is not math
+MATH = re.compile(r'\$\$[^$]+\$\$|\$[^\s$](?:[^$\n]*[^\s$])?\$(?!\d)|\\\(|\\\[')
+
+
+def detect_features(slides: Iterable[Dict[str, Any]], config: Dict[str, Any]) -> Set[str]:
+    """
+    Runtime features a deck needs, from its slide content.
+
+    Detection can be overridden per feature through ``config``, e.g.
+    ``config={'mathjax': True}`` or ``config={'plugins': ['notes', 'zoom']}``.
+    """
+    features = {'zoom', 'search'}
+    for slide in slides:
+        if slide.get('notes'):
+            features.add('notes')
+        for value in slide.values():
+            if not isinstance(value, str):
+                value = str(value) if hasattr(value, '__html__') else ''
+            if 'Plotly.' in value:
+                features.add('plotly')
+            if '<code' in value:
+                features.add('highlight')
+            if MATH.search(value):
+                features.add('mathjax')
+
+    if 'plugins' in config:
+        features -= {'notes', 'highlight', 'zoom', 'search'}
+        features |= set(config['plugins'])
+    for library in ('plotly', 'mathjax'):
+        if library in config:
+            features.discard(library)
+            if config[library]:
+                features.add(library)
+    return features
+
+
+def vendor_dir(directory: Optional[str] = None) -> Path:
+    """Vendored runtime: ``directory``, ``$PYSLIDES_VENDOR_DIR`` or the cache"""
+    if directory is not None:
+        return Path(directory)
+    if os.environ.get('PYSLIDES_VENDOR_DIR'):
+        return Path(os.environ['PYSLIDES_VENDOR_DIR'])
+    return default_cache_dir() / 'vendor'
+
+
+def read_vendored(asset: RuntimeAsset, directory: Optional[str] = None) -> bytes:
+    """Read an asset from the vendor directory (never from the network)"""
+    path = vendor_dir(directory) / asset.vendor_path
+    if not path.is_file():
+        raise FileNotFoundError(
+            f"{asset.vendor_path} is not vendored in {vendor_dir(directory)}. "
+            f"Run 'pyslides vendor' once with network access, or pass vendor_dir=...")
+    return path.read_bytes()
+
+
+def minify(data: bytes, kind: str) -> bytes:
+    """
+    Cheap, safe minification.
+
+    The vendored scripts are already minified distributions, so only their
+    source map references are dropped. Stylesheets lose comments (except
+    ``/*!`` licence headers) and redundant whitespace.
+    """
+    text = data.decode('utf-8')
+    if kind == 'css':
+        text = re.sub(r'/\*(?!!).*?\*/', '', text, flags=re.S)
+        text = re.sub(r'\s+', ' ', text)
+        text = re.sub(r'\s*([{}:;,>])\s*', r'\1', text)
+        text = text.replace(';}', '}')
+    text = re.sub(r'\n?[/][/*]# sourceMappingURL=\S*( \*/)?\s*$', '', text)
+    return text.strip().encode('utf-8')
+
+
+def resolve_runtime(
+    mode: str,
+    theme: str,
+    features: Set[str],
+    directory: Optional[str] = None,
+    asset_writer: Any = None
+) -> Dict[str, Any]:
+    """
+    Template variables describing the runtime for one bundle mode.
+
+    Returns ``styles``, ``head_scripts`` and ``scripts`` (each a list of
+    ``{'name', 'href'}`` or ``{'name', 'inline'}`` dicts), the Reveal
+    ``plugins`` to register and the ``features`` themselves.
+    """
+    if mode not in BUNDLE_MODES:
+        raise ValueError(f"Unknown bundle mode '{mode}'. Options: {list(BUNDLE_MODES)}")
+
+    runtime = dict(styles=[], head_scripts=[], scripts=[], plugins=[], features=sorted(features))
+    for asset in runtime_assets(theme, features, offline=mode != 'cdn'):
+        if mode == 'cdn':
+            entry = dict(name=asset.name, href=asset.url)
+        else:
+            data = minify(read_vendored(asset, directory), asset.kind)
+            if mode == 'inline':
+                text = data.decode('utf-8')
+                if asset.kind == 'js':
+                    # Keep the HTML parser from ending the <script> element early
+                    text = text.replace('</script', '<\\/script')
+                entry = dict(name=asset.name, inline=text)
+            else:
+                entry = dict(name=asset.name,
+                             href=asset_writer.add(data, asset.kind, stem=asset.name))
+
+        if asset.kind == 'css':
+            runtime['styles'].append(entry)
+        elif asset.placement == 'head':
+            runtime['head_scripts'].append(entry)
+        else:
+            runtime['scripts'].append(entry)
+        if asset.plugin:
+            runtime['plugins'].append(asset.plugin)
+    return runtime
+
+
+def fetch_vendor(directory: Optional[str] = None, themes: Iterable[str] = THEMES) -> List[Path]:
+    """
+    Download every runtime asset into the vendor directory (needs network).
+
+    Existing files are kept. Returns the paths that were downloaded.
+    """
+    import urllib.request
+
+    target = vendor_dir(directory)
+    wanted = {}
+    for theme in themes:
+        for offline in (True, False):
+            for asset in runtime_assets(theme, {'highlight', 'notes', 'zoom', 'search',
+                                                'plotly', 'mathjax'}, offline):
+                wanted[asset.vendor_path] = asset.url
+
+    downloaded = []
+    for relative, url in sorted(wanted.items()):
+        path = target / relative
+        if path.is_file():
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with urllib.request.urlopen(url) as response:
+            path.write_bytes(response.read())
+        downloaded.append(path)
+    return downloaded
@@ -0,0 +1,294 @@
+"""
+Persistent on-disk caches shared by every deck built on a machine.
+
+Entries are content addressed: the key is a stable hash of everything that
+determines the cached value, so an unchanged input is never converted twice
+and a changed one can never be served stale.
+"""
+
+######################
+# Standard libraries #
+######################
+from typing import Optional, Dict, Union
+from pathlib import Path
+import hashlib
+import io
+import os
+import pickle
+import re
+import threading
+import uuid
+
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Pickle LONG1 opcode with a 5 to 8 byte payload: how id() values are written
+LONG1_ID = re.compile(rb'\x8a([\x05-\x08])')
+
+
+def default_cache_dir() -> Path:
+    """
+    Root directory for pySlides caches.
+
+    ``$PYSLIDES_CACHE_DIR`` wins, then ``$XDG_CACHE_HOME/pyslides``, then
+    ``~/.cache/pyslides``.
+    """
+    if os.environ.get('PYSLIDES_CACHE_DIR'):
+        return Path(os.environ['PYSLIDES_CACHE_DIR'])
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'pyslides'
+
+
+def stable_hash(*parts: Union[str, bytes]) -> str:
+    """Hex SHA-256 of the given parts (length prefixed, so parts never run together)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        digest.update(len(part).to_bytes(8, 'little'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def pickle_digest(obj) -> Optional[str]:
+    """
+    Stable hash of an object's pickled state, or None if it cannot be pickled.
+
+    Some objects (matplotlib figures among them) pickle the ``id()`` of other
+    objects, which changes from run to run. Those integers are replaced by the
+    pickle memo index of the object they point at before hashing. The pickle
+    is scanned for them with a regular expression rather than decoded, so the
+    key costs little more than the pickling itself.
+    """
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, protocol=4)
+    try:
+        pickler.dump(obj)
+    except Exception:
+        return None
+    memo = pickler.memo.copy()
+
+    data = buffer.getbuffer()
+    digest = hashlib.sha256()
+    done = 0
+    for match in LONG1_ID.finditer(data):
+        start, end = match.end(), match.end() + match.group(1)[0]
+        if match.start() < done:
+            continue
+        entry = memo.get(int.from_bytes(data[start:end], 'little', signed=True))
+        if entry is not None:
+            digest.update(data[done:match.start()])
+            digest.update(b'memo:%d;' % entry[0])
+            done = end
+    digest.update(data[done:])
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Size-bounded, content-addressed cache of text (or binary) values on disk.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Where entries are stored. Defaults to ``default_subdir`` under
+        :func:`default_cache_dir`.
+    max_bytes : int, optional
+        Upper bound on the total size of the entries. When it is exceeded the
+        least recently used entries are evicted.
+    """
+
+    default_subdir = 'entries'
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        if directory is None:
+            directory = default_cache_dir() / self.default_subdir
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def _entries(self):
+        if not self.directory.is_dir():
+            return []
+        return [path for path in self.directory.glob('*/*') if path.is_file()]
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for ``key`` and mark it recently used"""
+        data = self.get_bytes(key)
+        return None if data is None else data.decode('utf-8')
+
+    def put(self, key: str, value: str):
+        """Store ``value`` under ``key``, evicting old entries if needed"""
+        self.put_bytes(key, value.encode('utf-8'))
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """Binary variant of :meth:`get`"""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put_bytes(self, key: str, data: bytes):
+        """Binary variant of :meth:`put`"""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f'{key}.{uuid.uuid4().hex}.part')
+        partial.write_bytes(data)
+        os.replace(partial, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(entry.stat().st_size for entry in self._entries())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is 80% full"""
+        entries = []
+        for entry in self._entries():
+            try:
+                entries.append((entry.stat(), entry))
+            except OSError:
+                continue
+        entries.sort(key=lambda item: item[0].st_mtime)
+        size = sum(stat.st_size for stat, _ in entries)
+        for stat, entry in entries:
+            if size <= self.max_bytes * 0.8:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            size -= stat.st_size
+        self._size = size
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        for entry in self._entries():
+            entry.unlink()
+        with self._lock:
+            self.hits = self.misses = 0
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters plus the current number and size of entries"""
+        entries = self._entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'bytes': sum(entry.stat().st_size for entry in entries)
+        }
+
+
+class FigureCache(DiskCache):
+    """
+    Cache of converted figure HTML, keyed on the figure and its settings.
+
+    Examples
+    --------
+    >>> cache = FigureCache("/tmp/pyslides-figures", max_bytes=64 * 1024 * 1024)
+    >>> slides = Slides(figure_cache=cache)
+    >>> cache.stats()
+    {'hits': 0, 'misses': 0, 'entries': 0, 'bytes': 0}
+    """
+
+    default_subdir = 'figures'
+
+
+class FragmentCache(DiskCache):
+    """
+    Cache of rendered ``<section>`` fragments, keyed on the slide content,
+    the deck settings the slide template sees and the template source.
+
+    Examples
+    --------
+    >>> slides = Slides(fragment_cache=FragmentCache("/tmp/pyslides-fragments"))
+    """
+
+    default_subdir = 'fragments'
+
+
+class BackgroundCache(DiskCache):
+    """
+    Cache of optimised background images, keyed on the source image and the
+    target size and encoding.
+
+    Examples
+    --------
+    >>> set_background_cache(BackgroundCache("/tmp/pyslides-backgrounds"))
+    """
+
+    default_subdir = 'backgrounds'
+
+
+_default_figure_cache = None
+_default_fragment_cache = None
+_default_background_cache = None
+
+
+def get_figure_cache() -> Optional[FigureCache]:
+    """
+    Return the process-wide figure cache.
+
+    Returns None when caching is switched off with ``PYSLIDES_NO_CACHE=1``.
+    """
+    global _default_figure_cache
+    if os.environ.get('PYSLIDES_NO_CACHE', '') not in ('', '0'):
+        return None
+    if _default_figure_cache is None:
+        _default_figure_cache = FigureCache()
+    return _default_figure_cache
+
+
+def set_figure_cache(cache: Optional[FigureCache]):
+    """Replace the process-wide figure cache (``None`` resets to the default)"""
+    global _default_figure_cache
+    _default_figure_cache = cache
+
+
+def get_fragment_cache() -> Optional[FragmentCache]:
+    """Return the process-wide fragment cache (None under ``PYSLIDES_NO_CACHE=1``)"""
+    global _default_fragment_cache
+    if os.environ.get('PYSLIDES_NO_CACHE', '') not in ('', '0'):
+        return None
+    if _default_fragment_cache is None:
+        _default_fragment_cache = FragmentCache()
+    return _default_fragment_cache
+
+
+def set_fragment_cache(cache: Optional[FragmentCache]):
+    """Replace the process-wide fragment cache (``None`` resets to the default)"""
+    global _default_fragment_cache
+    _default_fragment_cache = cache
+
+
+def get_background_cache() -> Optional[BackgroundCache]:
+    """Return the process-wide background image cache (None under ``PYSLIDES_NO_CACHE=1``)"""
+    global _default_background_cache
+    if os.environ.get('PYSLIDES_NO_CACHE', '') not in ('', '0'):
+        return None
+    if _default_background_cache is None:
+        _default_background_cache = BackgroundCache()
+    return _default_background_cache
+
+
+def set_background_cache(cache: Optional[BackgroundCache]):
+    """Replace the process-wide background image cache (``None`` resets to the default)"""
+    global _default_background_cache
+    _default_background_cache = cache
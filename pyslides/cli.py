@@ -0,0 +1,128 @@
+"""
+Command line interface: ``pyslides <command> ...``
+
+Commands
+--------
+build
+    Build every deck declared by a Python script, optionally in parallel.
+serve
+    Serve a deck script with live reload while editing it.
+vendor
+    Download the Reveal.js, plotly.js and MathJax runtime for offline bundles.
+"""
+
+######################
+# Standard libraries #
+######################
+from typing import List, Optional
+import argparse
+import json
+import sys
+
+from pyslides.batch import DeckSpec, build_many, load_script
+from pyslides.bundle import THEMES, fetch_vendor, vendor_dir
+
+
+def _script_specs(module) -> List[DeckSpec]:
+    """Deck specs declared by a build script (``decks()`` or ``DECKS``)"""
+    if hasattr(module, 'decks'):
+        return list(module.decks())
+    if hasattr(module, 'DECKS'):
+        return list(module.DECKS)
+    raise SystemExit(f"{module.__file__} defines neither decks() nor DECKS")
+
+
+def build(args) -> int:
+    """``pyslides build``: build the decks of a script and report timings"""
+    module = load_script(args.script)
+    specs = _script_specs(module)
+    results = build_many(specs, workers=args.workers, executor=args.executor,
+                         scripts=[args.script])
+
+    width = max([len(result.output) for result in results] + [6])
+    for result in results:
+        status = '✓' if result.ok else '✗'
+        print(f"{status} {result.output:<{width}}  build {result.build_seconds:7.2f}s"
+              f"  save {result.save_seconds:7.2f}s")
+    failures = [result for result in results if not result.ok]
+    for result in failures:
+        print(f"\n✗ {result.output} failed:\n{result.error}", file=sys.stderr)
+    print(f"{len(results) - len(failures)}/{len(results)} decks built in "
+          f"{sum(result.seconds for result in results):.2f}s of work")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump([dict(output=result.output, build_seconds=result.build_seconds,
+                            save_seconds=result.save_seconds, error=result.error)
+                       for result in results], f, indent=2)
+    return 1 if failures else 0
+
+
+def serve(args) -> int:
+    """``pyslides serve``: rebuild a deck script on change and live-reload browsers"""
+    from pyslides.server import DevServer
+
+    DevServer(args.script, host=args.host, port=args.port, watch=args.watch,
+              name=args.name).serve_forever()
+    return 0
+
+
+def vendor(args) -> int:
+    """``pyslides vendor``: fill the local runtime copy used by offline bundles"""
+    downloaded = fetch_vendor(args.dir, themes=args.themes or THEMES)
+    print(f"✓ {len(downloaded)} file(s) downloaded to: {vendor_dir(args.dir)}")
+    return 0
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='pyslides', description='pySlides command line tools')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    build_parser = commands.add_parser(
+        'build', help='build the decks declared by a script',
+        description="Build every deck declared by SCRIPT. The script defines decks(), "
+                    "returning pyslides.batch.DeckSpec objects, or a DECKS list.")
+    build_parser.add_argument('script', help='Python build script')
+    build_parser.add_argument('-j', '--workers', type=int, default=None,
+                              help='number of decks built concurrently')
+    build_parser.add_argument('--executor', choices=['process', 'thread'], default='process',
+                              help='worker pool kind (default: process)')
+    build_parser.add_argument('--report', metavar='JSON',
+                              help='write per-deck timings and failures to this file')
+    build_parser.set_defaults(func=build)
+
+    serve_parser = commands.add_parser(
+        'serve', help='serve a deck script with live reload',
+        description="Run SCRIPT, serve the deck it saves and rebuild it whenever the script, "
+                    "a local module it imports or a watched path changes. Open browsers "
+                    "update in place and stay on the current slide.")
+    serve_parser.add_argument('script', help='Python script building the deck')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='address to bind (default: 127.0.0.1)')
+    serve_parser.add_argument('-p', '--port', type=int, default=8000, help='port (default: 8000)')
+    serve_parser.add_argument('-w', '--watch', action='append', default=[], metavar='PATH',
+                              help='extra file or directory to watch (repeatable)')
+    serve_parser.add_argument('--name', default=None,
+                              help='global variable holding the deck (default: the saved deck)')
+    serve_parser.set_defaults(func=serve)
+
+    vendor_parser = commands.add_parser(
+        'vendor', help='download the runtime for offline bundles',
+        description="Download Reveal.js, its plugins, plotly.js and MathJax so that "
+                    "save(bundle='inline'|'sidecar') works without network access.")
+    vendor_parser.add_argument('--dir', default=None,
+                               help='target directory (default: $PYSLIDES_VENDOR_DIR or the cache)')
+    vendor_parser.add_argument('--themes', nargs='+', choices=THEMES, default=None,
+                               help='themes to fetch (default: all)')
+    vendor_parser.set_defaults(func=vendor)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Console entry point"""
+    args = make_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
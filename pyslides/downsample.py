@@ -0,0 +1,246 @@
+"""
+Reduce Plotly figures before they are embedded.
+
+Works on the figure's JSON dict with NumPy: long scatter traces are
+downsampled (LTTB or min/max buckets), very long ones switched to WebGL, and
+numeric arrays are written as base64 typed arrays instead of decimal text.
+"""
+
+######################
+# Standard libraries #
+######################
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import base64
+
+import numpy as np
+
+
+# Trace types whose points may be downsampled or moved to WebGL
+SCATTER_TYPES = ('scatter', 'scattergl')
+
+# Per-point trace attributes that must be subset along with x and y
+POINT_ATTRIBUTES = ('x', 'y', 'text', 'hovertext', 'customdata', 'ids')
+MARKER_ATTRIBUTES = ('color', 'size', 'opacity', 'symbol')
+
+# Plotly.js typed array dtypes
+TYPED_DTYPES = {
+    np.dtype('int8'): 'i1', np.dtype('uint8'): 'u1', np.dtype('int16'): 'i2',
+    np.dtype('uint16'): 'u2', np.dtype('int32'): 'i4', np.dtype('uint32'): 'u4',
+    np.dtype('float32'): 'f4', np.dtype('float64'): 'f8',
+}
+
+# Arrays shorter than this stay as JSON text (info arrays such as ranges and
+# domains are never long enough to be touched)
+MIN_BINARY_LENGTH = 64
+
+
+@dataclass
+class TraceReduction:
+    """What happened to one trace"""
+    index: int
+    name: Optional[str]
+    original: int
+    kept: int
+    webgl: bool = False
+
+
+@dataclass
+class ReductionReport:
+    """Points kept and dropped per trace by :func:`reduce_figure`"""
+    traces: List[TraceReduction] = field(default_factory=list)
+
+    @property
+    def original(self) -> int:
+        return sum(trace.original for trace in self.traces)
+
+    @property
+    def kept(self) -> int:
+        return sum(trace.kept for trace in self.traces)
+
+    @property
+    def dropped(self) -> int:
+        return self.original - self.kept
+
+    def __str__(self) -> str:
+        webgl = sum(trace.webgl for trace in self.traces)
+        return (f"downsampled {self.original} -> {self.kept} points "
+                f"({self.dropped} dropped, {webgl} trace(s) on WebGL)")
+
+
+def decode_array(value: Any) -> Optional[np.ndarray]:
+    """Trace array (list, ndarray or typed array spec) as an ndarray, else None"""
+    if isinstance(value, dict) and 'bdata' in value and 'dtype' in value:
+        array = np.frombuffer(base64.b64decode(value['bdata']), dtype=np.dtype(value['dtype']).newbyteorder('<'))
+        if value.get('shape'):
+            array = array.reshape([int(n) for n in str(value['shape']).split(',')])
+        return array
+    if isinstance(value, np.ndarray):
+        return value
+    if isinstance(value, (list, tuple)):
+        try:
+            return np.asarray(value)
+        except ValueError:
+            return None
+    return None
+
+
+def encode_array(array: np.ndarray) -> Any:
+    """Numeric arrays as Plotly.js typed array specs, anything else as a list"""
+    if array.dtype.kind == 'b':
+        array = array.astype('uint8')
+    elif array.dtype.kind in 'iu' and array.dtype not in TYPED_DTYPES:
+        if array.size and np.iinfo('int32').min <= array.min() and array.max() <= np.iinfo('int32').max:
+            array = array.astype('int32')
+        else:
+            array = array.astype('float64')
+    if array.dtype not in TYPED_DTYPES or array.ndim > 2:
+        return array.tolist()
+    spec = {'dtype': TYPED_DTYPES[array.dtype],
+            'bdata': base64.b64encode(array.astype(array.dtype.newbyteorder('<')).tobytes()).decode()}
+    if array.ndim == 2:
+        spec['shape'] = ', '.join(str(n) for n in array.shape)
+    return spec
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of ``n_out`` representative points"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    every = (n - 2) / (n_out - 2)
+    edges = (np.arange(n_out - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    selected = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = np.nanmean(y[end:next_end]) if np.isfinite(y[end:next_end]).any() else 0.0
+        area = np.abs((x[selected] - avg_x) * (y[start:end] - y[selected])
+                      - (x[selected] - x[start:end]) * (avg_y - y[selected]))
+        selected = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        indices[bucket + 1] = selected
+    return indices
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the minimum and maximum of each of ``n_out // 2`` buckets"""
+    n = len(y)
+    buckets = max(n_out // 2, 1)
+    if n_out >= n:
+        return np.arange(n)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    lows = offsets + np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+    indices = np.unique(np.concatenate([[0, n - 1], lows, highs]))
+    return indices[indices < n]
+
+
+def _positions(x: Optional[np.ndarray], n: int) -> np.ndarray:
+    """Numeric x positions for the downsampling maths (dates as int64 ticks), else 0..n-1"""
+    if x is None or x.ndim != 1 or len(x) != n:
+        return np.arange(n)
+    if x.dtype.kind in 'Mm':
+        return x.view('i8')
+    return x if x.dtype.kind in 'iuf' else np.arange(n)
+
+
+def _reduce_trace(trace: Dict[str, Any], max_points: int, method: str) -> Optional[int]:
+    """Downsample one scatter trace in place; return its new length (None if untouched)"""
+    y = decode_array(trace.get('y'))
+    if y is None or y.ndim != 1 or len(y) <= max_points or y.dtype.kind not in 'iuf':
+        return None
+    positions = _positions(decode_array(trace.get('x')), len(y))
+
+    if method == 'lttb':
+        keep = lttb_indices(positions.astype('float64'), y.astype('float64'), max_points)
+    else:
+        keep = minmax_indices(y.astype('float64'), max_points)
+
+    for owner, keys in ((trace, POINT_ATTRIBUTES), (trace.get('marker') or {}, MARKER_ATTRIBUTES)):
+        for key in keys:
+            values = decode_array(owner.get(key))
+            if values is not None and values.ndim >= 1 and len(values) == len(y):
+                owner[key] = values[keep]
+    return len(keep)
+
+
+def _binary_arrays(node: Any) -> Any:
+    """
+    Recursively replace long numeric arrays by typed array specs. Other
+    arrays (dates, strings, objects) are left to Plotly's JSON encoder,
+    which writes dates as ISO strings.
+    """
+    if isinstance(node, dict):
+        if 'bdata' in node and 'dtype' in node:
+            return node
+        return {key: _binary_arrays(value) for key, value in node.items()}
+    if isinstance(node, (list, tuple, np.ndarray)):
+        array = decode_array(node)
+        if array is not None and array.dtype.kind in 'biuf' and array.size >= MIN_BINARY_LENGTH:
+            return encode_array(array)
+        if isinstance(node, np.ndarray):
+            return node
+        return [_binary_arrays(item) for item in node]
+    return node
+
+
+def reduce_figure(
+    figure: Dict[str, Any],
+    max_points: Optional[int] = None,
+    method: str = 'lttb',
+    webgl_threshold: Optional[int] = None,
+    binary: bool = True
+) -> ReductionReport:
+    """
+    Reduce a Plotly figure dict (``fig.to_plotly_json()``) in place.
+
+    Parameters
+    ----------
+    figure : dict
+        Figure JSON; modified in place
+    max_points : int, optional
+        Target number of points per scatter trace
+    method : {'lttb', 'minmax'}, optional
+        Largest-Triangle-Three-Buckets keeps the visual shape of a line;
+        min/max buckets keep every extreme. Default: 'lttb'
+    webgl_threshold : int, optional
+        Switch 'scatter' traces with more points than this to 'scattergl'
+    binary : bool, optional
+        Encode long numeric arrays as base64 typed arrays. Default: True
+
+    Returns
+    -------
+    ReductionReport
+    """
+    if method not in ('lttb', 'minmax'):
+        raise ValueError(f"Unknown downsampling method '{method}'. Options: 'lttb', 'minmax'")
+
+    report = ReductionReport()
+    traces = figure.get('data') or []
+    for index, trace in enumerate(traces):
+        if trace.get('type', 'scatter') not in SCATTER_TYPES:
+            continue
+        y = decode_array(trace.get('y'))
+        if y is None or y.ndim != 1:
+            continue
+        original = kept = len(y)
+        if max_points is not None:
+            kept = _reduce_trace(trace, max_points, method) or original
+        webgl = (webgl_threshold is not None and kept > webgl_threshold
+                 and trace.get('type', 'scatter') == 'scatter')
+        if webgl:
+            trace['type'] = 'scattergl'
+        report.traces.append(TraceReduction(index, trace.get('name'), original, kept, webgl))
+
+    if binary:
+        figure['data'] = [_binary_arrays(trace) for trace in traces]
+    return report
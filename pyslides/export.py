@@ -0,0 +1,501 @@
+"""
+PDF and image export through a headless browser.
+
+:class:`PDFExporter` keeps one browser running with a pool of pages and
+prints decks from in-memory HTML, opened in Reveal's print view. Each page
+is printed as soon as the deck signals readiness (``window.__pyslidesReady``:
+Reveal ready, print layout built, charts and formulas rendered), not after a
+fixed delay. Batches of decks are printed concurrently on the page pool.
+
+:class:`ImageExporter` captures PNGs of single slides (and thumbnails) on the
+same kind of pool. Files are named after a hash of the slide and everything
+that affects how it looks, so re-exports skip slides that did not change.
+
+Decks rendered in memory are served to the page from a private origin whose
+paths map to local files, so relative image paths and sidecar assets resolve
+against the output's directory, as if the deck had been saved there.
+
+The browser is reached through a :class:`BrowserBackend`. The default,
+:class:`PlaywrightBackend`, drives Chromium with Playwright; tests and other
+engines can plug in their own.
+"""
+
+######################
+# Standard libraries #
+######################
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import concurrent.futures
+import copy
+import io
+import json
+import time
+import traceback
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+from pyslides.assets import _atomic_write, relative_url
+from pyslides.cache import stable_hash
+from pyslides.pyslides import _slide_digest, get_renderer
+from pyslides.trace import phase, traced_deck
+
+
+READY_EXPRESSION = 'window.__pyslidesReady === true'
+
+# Go to a slide and resolve once whatever it mounts has rendered
+SHOW_SLIDE = 'index => { Reveal.slide(index); return window.pyslidesSettle(); }'
+
+# Requests to this origin are answered by the exporter: the deck itself, and
+# local files for every other path (it never reaches the network)
+DECK_ORIGIN = 'http://pyslides.invalid'
+
+# Page.pdf options; Reveal's print stylesheet lays out one slide per page
+DEFAULT_PDF_OPTIONS = dict(format='A4', landscape=True, print_background=True)
+
+
+class BrowserBackend:
+    """
+    Interface of a headless browser used by the exporters.
+
+    ``new_page`` returns a page object with the coroutine methods of
+    Playwright's async ``Page`` that the exporters use: ``route(url,
+    handler)``, ``unroute(url)``, ``goto(url, wait_until, timeout)``,
+    ``wait_for_function(expression, timeout)``, ``pdf(**options) -> bytes``,
+    ``set_viewport_size(size)``, ``evaluate(expression, arg)``,
+    ``screenshot(type) -> bytes`` and ``close()``. Route handlers receive
+    objects with ``request.url`` and ``fulfill(status, body, path,
+    content_type)``. Timeouts are in milliseconds.
+    """
+
+    async def start(self):
+        """Launch the browser"""
+        raise NotImplementedError
+
+    async def new_page(self) -> Any:
+        """Open a new page (tab)"""
+        raise NotImplementedError
+
+    async def stop(self):
+        """Close the browser"""
+        raise NotImplementedError
+
+
+class PlaywrightBackend(BrowserBackend):
+    """
+    Playwright-driven browser (requires ``pip install pyslides[export]``).
+
+    Parameters
+    ----------
+    browser : str, optional
+        Playwright browser type. Only Chromium can print PDFs. Default: 'chromium'
+    **launch_options
+        Passed to ``launch`` (``executable_path``, ``args``, ...)
+    """
+
+    def __init__(self, browser: str = 'chromium', **launch_options):
+        self.browser_type = browser
+        self.launch_options = launch_options
+        self._playwright = None
+        self._browser = None
+
+    async def start(self):
+        try:
+            from playwright.async_api import async_playwright
+        except ImportError:
+            raise ImportError(
+                "PDF export requires playwright. Install with: "
+                "pip install pyslides[export]"
+            )
+        self._playwright = await async_playwright().start()
+        self._browser = await getattr(self._playwright, self.browser_type).launch(**self.launch_options)
+
+    async def new_page(self) -> Any:
+        return await self._browser.new_page()
+
+    async def stop(self):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._browser = self._playwright = None
+
+
+@dataclass
+class ExportResult:
+    """Outcome of one deck of an export batch"""
+    output: str
+    seconds: float = 0.0
+    bytes: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BrowserPool:
+    """
+    One browser with up to ``pages`` pages in use at a time; base of the exporters.
+
+    Parameters
+    ----------
+    backend : BrowserBackend, optional
+        Browser to use. Default: :class:`PlaywrightBackend`
+    pages : int, optional
+        Number of pages working concurrently
+    timeout : float, optional
+        Seconds to wait for a deck to load and render before failing it
+    save_options : dict, optional
+        Options for rendering the HTML (see :meth:`Slides.save`), e.g.
+        ``bundle='inline'`` to export without network access
+    """
+
+    def __init__(self, backend: Optional[BrowserBackend] = None, pages: int = 4, timeout: float = 60.0,
+                 save_options: Optional[Dict[str, Any]] = None):
+        if pages < 1:
+            raise ValueError("pages must be at least 1")
+        self.backend = backend or PlaywrightBackend()
+        self.pages = pages
+        self.timeout = timeout
+        self.save_options = save_options or {}
+        self._idle: List[Any] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._started = False
+
+    async def start(self):
+        if not self._started:
+            with phase('launch browser'):
+                await self.backend.start()
+            self._slots = asyncio.Semaphore(self.pages)
+            self._started = True
+        return self
+
+    async def close(self):
+        if self._started:
+            pages, self._idle = self._idle, []
+            for page in pages:
+                await page.close()
+            await self.backend.stop()
+            self._started = False
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _acquire(self) -> Any:
+        await self._slots.acquire()
+        try:
+            return self._idle.pop() if self._idle else await self.backend.new_page()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def _release(self, page: Any, failed: bool = False):
+        """Return a page to the pool; a failed page may be stuck mid-load and is closed"""
+        try:
+            if failed:
+                await page.close()
+            else:
+                self._idle.append(page)
+        finally:
+            self._slots.release()
+
+    def _render(self, slides: Any, directory: Path, stem: str, print_view: bool = False) -> str:
+        """The deck's HTML, with sidecar files (if any) written to ``directory``"""
+        options = dict(self.save_options)
+        if options.get('assets') == 'sidecar' or options.get('bundle') == 'sidecar' or options.get('shard'):
+            if options.get('assets_dir') is None:
+                options['assets_dir'] = directory / f'{stem}_assets'
+            if options.get('assets_url') is None:
+                options['assets_url'] = relative_url(Path(options['assets_dir']).absolute(), directory)
+        return slides.to_html(print_view=print_view, base_dir=directory, **options)
+
+    async def _serve(self, page: Any, html: str, directory: Path) -> str:
+        """Route the page's requests to ``html`` and local files; return the deck's URL"""
+        url = f"{DECK_ORIGIN}{urlsplit(directory.absolute().as_uri()).path.rstrip('/')}/index.html"
+        root = directory.resolve()
+
+        async def handle(route):
+            requested = urlsplit(route.request.url)
+            if f'{DECK_ORIGIN}{requested.path}' == url:
+                await route.fulfill(status=200, body=html, content_type='text/html; charset=utf-8')
+                return
+            path = Path(url2pathname(requested.path)).resolve()
+            # Only files of the deck's directory are served
+            if root in path.parents and path.is_file():
+                await route.fulfill(status=200, path=str(path))
+            else:
+                await route.fulfill(status=404, body='')
+
+        await page.unroute(f'{DECK_ORIGIN}/**')
+        await page.route(f'{DECK_ORIGIN}/**', handle)
+        return url
+
+    async def _load(self, page: Any, html: Optional[str], url: Optional[str], label: str,
+                    directory: Optional[Path] = None):
+        """
+        Open a deck and wait for its readiness signal. In-memory ``html`` is
+        served as if saved in ``directory`` (default: the working directory).
+        """
+        timeout = self.timeout * 1000
+        with phase('load deck', deck=label):
+            if html is not None:
+                url = await self._serve(page, html, Path(directory or '.'))
+            await page.goto(url, wait_until='load', timeout=timeout)
+        with phase('wait for ready', deck=label):
+            await page.wait_for_function(READY_EXPRESSION, timeout=timeout)
+
+
+class PDFExporter(BrowserPool):
+    """
+    Print decks to PDF on one browser with a pool of pages.
+
+    Parameters
+    ----------
+    pdf_options : dict, optional
+        Overrides of the ``Page.pdf`` options (:data:`DEFAULT_PDF_OPTIONS`)
+    **pool_options
+        ``backend``, ``pages``, ``timeout`` and ``save_options`` (see :class:`BrowserPool`)
+
+    Examples
+    --------
+    >>> async with PDFExporter(pages=8) as exporter:
+    ...     await exporter.export(slides, "deck.pdf")
+    ...     results = await exporter.export_many([(deck, f"{name}.pdf") for name, deck in decks])
+    """
+
+    def __init__(self, pdf_options: Optional[Dict[str, Any]] = None, **pool_options):
+        super().__init__(**pool_options)
+        self.pdf_options = dict(DEFAULT_PDF_OPTIONS, **(pdf_options or {}))
+
+    async def _print(self, page: Any, html: Optional[str], url: Optional[str], label: str,
+                     directory: Optional[Path] = None) -> bytes:
+        await self._load(page, html, url, label, directory)
+        with phase('print pdf', deck=label):
+            return await page.pdf(**self.pdf_options)
+
+    async def export(self, slides: Any, output_path: Optional[str] = None,
+                     html_path: Optional[str] = None) -> bytes:
+        """
+        Print one deck and return the PDF bytes, also written to ``output_path`` if given.
+
+        The deck is rendered in memory and loaded as if saved next to
+        ``output_path``, so relative paths in it resolve from there. With
+        ``html_path``, that saved deck is printed instead (``slides`` may then
+        be None).
+        """
+        await self.start()
+        label = str(output_path or html_path or 'deck')
+        directory = Path(output_path).absolute().parent if output_path is not None else Path.cwd()
+        if html_path is None:
+            with phase('render html', deck=label), traced_deck(label):
+                stem = Path(output_path).stem if output_path is not None else 'deck'
+                html, url = self._render(slides, directory, stem, print_view=True), None
+        else:
+            html, url = None, f"{Path(html_path).absolute().as_uri()}?print-pdf"
+
+        page = await self._acquire()
+        try:
+            pdf = await self._print(page, html, url, label, directory)
+        except BaseException:
+            await self._release(page, failed=True)
+            raise
+        await self._release(page)
+
+        if output_path is not None:
+            _atomic_write(Path(output_path), pdf)
+        return pdf
+
+    async def _export_one(self, slides: Any, output_path: str) -> ExportResult:
+        result = ExportResult(output=str(output_path))
+        start = time.perf_counter()
+        try:
+            result.bytes = len(await self.export(slides, output_path))
+        except Exception:
+            result.error = traceback.format_exc()
+        result.seconds = time.perf_counter() - start
+        return result
+
+    async def export_many(self, jobs: Iterable[Tuple[Any, str]]) -> List[ExportResult]:
+        """
+        Print ``(slides, output_path)`` pairs concurrently on the page pool.
+
+        Returns one :class:`ExportResult` per job, in order; a failing deck
+        carries its traceback in ``error`` and does not stop the batch.
+        """
+        await self.start()
+        return list(await asyncio.gather(*(self._export_one(slides, path) for slides, path in jobs)))
+
+
+@dataclass
+class SlideImage:
+    """PNG of one slide written by :class:`ImageExporter`"""
+    index: int
+    path: str
+    thumbnail: Optional[str] = None
+    skipped: bool = False  # unchanged since a previous export
+
+
+class ImageExporter(BrowserPool):
+    """
+    Capture PNGs of single slides, and optionally thumbnails, on a pool of pages.
+
+    Each page loads the deck once and steps through its share of the slides,
+    waiting after every step until the slide's charts and formulas have
+    rendered. Files are named ``slide-<number>-<hash>.png`` after everything
+    that affects the slide's look, so slides whose file exists are skipped
+    (without starting a browser when nothing changed). Older images of the
+    exported slides are removed.
+
+    Parameters
+    ----------
+    width, height : int, optional
+        Image size in pixels. Default: the deck's ``width``/``height`` config
+    thumbnail_width : int, optional
+        Also write a thumbnail this wide, ``slide-<number>-<hash>.w<width>.png``.
+        Relative paths in the deck resolve from the output directory.
+    **pool_options
+        ``backend``, ``pages``, ``timeout`` and ``save_options`` (see :class:`BrowserPool`)
+
+    Examples
+    --------
+    >>> async with ImageExporter(thumbnail_width=320) as exporter:
+    ...     images = await exporter.export(slides, "previews/")
+    """
+
+    def __init__(self, width: Optional[int] = None, height: Optional[int] = None,
+                 thumbnail_width: Optional[int] = None, **pool_options):
+        super().__init__(**pool_options)
+        self.width = width
+        self.height = height
+        self.thumbnail_width = thumbnail_width
+
+    def _snapshot_deck(self, slides: Any) -> Any:
+        """The deck without controls, progress bar, slide numbers or transitions"""
+        deck = copy.copy(slides)
+        deck.config = dict(slides.config, controls=False, progress=False, slide_number=False,
+                           transition='none')
+        return deck
+
+    def _key(self, deck: Any, index: int, size: Tuple[int, int], background_key: Optional[str] = None) -> str:
+        renderer = self.save_options.get('renderer') or deck.renderer or get_renderer()
+        return stable_hash(
+            renderer.template_digest('base.html'), renderer.template_digest('slide.html'),
+            deck.theme, deck.custom_css or '', json.dumps(deck.config, sort_keys=True, default=repr),
+            json.dumps(deck._fragment_context(), sort_keys=True), json.dumps(self.save_options,
+                                                                              sort_keys=True, default=repr),
+            '%dx%d' % size, _slide_digest(deck.slides[index]), background_key or '')[:16]
+
+    def _thumbnail(self, png: bytes, path: Path):
+        from PIL import Image
+
+        with Image.open(io.BytesIO(png)) as image:
+            height = max(1, round(image.height * self.thumbnail_width / image.width))
+            thumbnail = io.BytesIO()
+            image.convert('RGB').resize((self.thumbnail_width, height), Image.LANCZOS).save(
+                thumbnail, 'PNG', optimize=True)
+        _atomic_write(path, thumbnail.getvalue())
+
+    async def export(self, slides: Any, output_dir: str,
+                     indices: Optional[Iterable[int]] = None) -> List[SlideImage]:
+        """
+        Write PNGs of the slides at ``indices`` (default: all) to ``output_dir``.
+
+        Returns one :class:`SlideImage` per slide, in the order of ``indices``.
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        slides.convert_figures()
+        deck = self._snapshot_deck(slides)
+        size = (self.width or deck.config.get('width', 1920), self.height or deck.config.get('height', 1080))
+        indices = list(range(len(deck.slides)) if indices is None else indices)
+        for index in indices:
+            if not 0 <= index < len(deck.slides):
+                raise ValueError(f"Slide index {index} out of range (deck has {len(deck.slides)} slides)")
+
+        backgrounds = deck._backgrounds(base_dir=output_dir.absolute())[0]
+        images, todo = [], []
+        for index in indices:
+            background_key = backgrounds.get(deck.slides[index].get('background'))
+            stem = f"slide-{index + 1:03d}-{self._key(deck, index, size, background_key)}"
+            image = SlideImage(index, str(output_dir / f'{stem}.png'),
+                               str(output_dir / f'{stem}.w{self.thumbnail_width}.png') if self.thumbnail_width else None)
+            image.skipped = Path(image.path).exists()
+            if image.skipped and image.thumbnail and not Path(image.thumbnail).exists():
+                self._thumbnail(Path(image.path).read_bytes(), Path(image.thumbnail))
+            if not image.skipped:
+                todo.append(image)
+            images.append(image)
+
+        if todo:
+            await self.start()
+            with phase('render html', deck=str(output_dir)), traced_deck(str(output_dir)):
+                html = self._render(deck, output_dir.absolute(), 'slides')
+            queue = list(reversed(todo))
+            workers = [self._capture(html, queue, size, output_dir.absolute())
+                       for _ in range(min(self.pages, len(todo)))]
+            await asyncio.gather(*workers)
+
+        current = {Path(path).name for image in images for path in (image.path, image.thumbnail) if path}
+        for index in indices:
+            for stale in output_dir.glob(f'slide-{index + 1:03d}-*.png'):
+                if stale.name not in current:
+                    stale.unlink()
+        return images
+
+    async def _capture(self, html: str, queue: List[SlideImage], size: Tuple[int, int], directory: Path):
+        """Load the deck on one page and capture slides from the shared queue"""
+        page = await self._acquire()
+        failed = True
+        try:
+            await page.set_viewport_size(dict(width=size[0], height=size[1]))
+            await self._load(page, html, None, 'images', directory)
+            while queue:
+                image = queue.pop()
+                with phase('capture slide', slide=image.index):
+                    await page.evaluate(SHOW_SLIDE, image.index)
+                    png = await page.screenshot(type='png')
+                _atomic_write(Path(image.path), png)
+                if image.thumbnail:
+                    self._thumbnail(png, Path(image.thumbnail))
+            failed = False
+        finally:
+            await self._release(page, failed)
+
+
+def run_coroutine(coroutine) -> Any:
+    """Run a coroutine to completion, also from code already inside an event loop (notebooks)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coroutine).result()
+
+
+def export_pdfs(jobs: Iterable[Tuple[Any, str]], pages: int = 4, **exporter_options) -> List[ExportResult]:
+    """
+    Print many decks to PDF with one browser (blocking).
+
+    Parameters
+    ----------
+    jobs : iterable of (Slides, str)
+        Decks and the PDF paths to write them to
+    pages : int, optional
+        Number of decks printed concurrently
+    **exporter_options
+        Other :class:`PDFExporter` options (``backend``, ``timeout``, ...)
+
+    Examples
+    --------
+    >>> results = export_pdfs([(deck, f"{name}.pdf") for name, deck in decks], pages=8)
+    >>> failed = [result.output for result in results if not result.ok]
+    """
+    async def export():
+        async with PDFExporter(pages=pages, **exporter_options) as exporter:
+            return await exporter.export_many(jobs)
+    return run_coroutine(export())
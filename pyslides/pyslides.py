@@ -7,29 +7,188 @@ Modern slide deck generation using Reveal.js framework
 ######################
 # Standard libraries #
 ######################
-from dataclasses import dataclass
-from typing import Any, Optional, Dict, List, Union
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Any, Optional, Dict, List, Union, Iterator, Iterable
 from pathlib import Path
 import base64
+import concurrent.futures
+import importlib.util
+import io
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from html import escape as html_escape
 from io import BytesIO
 
-###################
-# HTML templating #
-###################
-from jinja2 import Environment, PackageLoader
+from pyslides.cache import (FigureCache, FragmentCache, get_background_cache, get_figure_cache,
+                            get_fragment_cache, pickle_digest, stable_hash)
+from pyslides.assets import (AssetWriter, CompressedWriter, default_assets_dir, pack_payload,
+                             precompress_formats, relative_url)
+from pyslides.backgrounds import EXTENSIONS as IMAGE_EXTENSIONS, BackgroundOptions, optimize_backgrounds
+from pyslides.bundle import BUNDLE_MODES, detect_features, resolve_runtime
+from pyslides.store import BlobFigure, dump_deck, read_manifest
+from pyslides.slide import Slide, make_slide
+from pyslides.stats import DeckStats, SizeBudget, analyze
+from pyslides.trace import current_trace, phase, traced_deck
 
-# Optional imports for visualization support
-try:
-    import plotly.graph_objects as go
-    HAS_PLOTLY = True
-except ImportError:
-    HAS_PLOTLY = False
+# Optional visualization support. Only probed here: the libraries themselves
+# are never imported by pySlides before the caller hands over a figure.
+HAS_PLOTLY = importlib.util.find_spec('plotly') is not None
+HAS_MATPLOTLIB = importlib.util.find_spec('matplotlib') is not None
 
-try:
-    import matplotlib.figure
-    HAS_MATPLOTLIB = True
-except ImportError:
-    HAS_MATPLOTLIB = False
+
+class Renderer:
+    """
+    Compile the deck templates once and reuse them across saves.
+
+    Building a Jinja2 ``Environment`` and compiling ``base.html`` is by far the
+    most expensive part of a small ``save``. A renderer keeps the environment
+    and the compiled templates alive so that every deck rendered through it
+    only pays for the render itself.
+
+    Parameters
+    ----------
+    template_dirs : list of str, optional
+        Extra directories searched before the packaged templates. A
+        ``base.html`` placed in one of them overrides the built-in layout.
+    bytecode_cache_dir : str, optional
+        Directory for Jinja2's on-disk bytecode cache. Cold processes sharing
+        the directory load the compiled template instead of recompiling it.
+    auto_reload : bool, optional
+        Check the template sources for changes on every render. Off by
+        default; call :meth:`invalidate` after editing templates instead.
+
+    Examples
+    --------
+    >>> renderer = Renderer(bytecode_cache_dir="/tmp/pyslides-bytecode")
+    >>> slides.save("presentation.html", renderer=renderer)
+    """
+
+    def __init__(
+        self,
+        template_dirs: Optional[List[str]] = None,
+        bytecode_cache_dir: Optional[str] = None,
+        auto_reload: bool = False
+    ):
+        # HTML templating (imported here, it is a noticeable share of import time)
+        from jinja2 import (Environment, PackageLoader, FileSystemLoader, ChoiceLoader,
+                            FileSystemBytecodeCache)
+
+        loaders = [FileSystemLoader(str(d)) for d in (template_dirs or [])]
+        loaders.append(PackageLoader(__name__, 'data'))
+
+        bytecode_cache = None
+        if bytecode_cache_dir is not None:
+            Path(bytecode_cache_dir).mkdir(parents=True, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(str(bytecode_cache_dir))
+
+        self.auto_reload = auto_reload
+        self.env = Environment(
+            loader=ChoiceLoader(loaders),
+            bytecode_cache=bytecode_cache,
+            auto_reload=auto_reload
+        )
+        self.env.filters['pack'] = pack_payload
+        self._templates = {}
+        self._digests = {}
+
+    def get_template(self, name: str = 'base.html'):
+        """Return the compiled template, compiling it on first use"""
+        template = self._templates.get(name)
+        if template is None or (self.auto_reload and not template.is_up_to_date):
+            template = self.env.get_template(name)
+            self._templates[name] = template
+            self._digests.pop(name, None)
+        return template
+
+    def template_digest(self, name: str) -> str:
+        """Hash of a template's source, for keying cached render output"""
+        self.get_template(name)
+        digest = self._digests.get(name)
+        if digest is None:
+            source, _, _ = self.env.loader.get_source(self.env, name)
+            digest = self._digests[name] = stable_hash(source)
+        return digest
+
+    def render(self, name: str = 'base.html', **context) -> str:
+        """Render a template to a string"""
+        return self.get_template(name).render(**context)
+
+    def stream(self, name: str = 'base.html', buffer_size: int = 1 << 16,
+               **context) -> Iterator[str]:
+        """
+        Render a template incrementally.
+
+        Template output is yielded in chunks of roughly ``buffer_size``
+        characters, so the whole document never has to exist in memory. A
+        single chunk is only larger than ``buffer_size`` when one piece of
+        template output (typically a slide's figure) is.
+        """
+        buffer, size = [], 0
+        for piece in self.get_template(name).generate(**context):
+            buffer.append(piece)
+            size += len(piece)
+            if size >= buffer_size:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield ''.join(buffer)
+
+    def invalidate(self):
+        """Drop every compiled template, including the on-disk bytecode"""
+        self._templates.clear()
+        self._digests.clear()
+        if self.env.cache is not None:
+            self.env.cache.clear()
+        if self.env.bytecode_cache is not None:
+            self.env.bytecode_cache.clear()
+
+
+_default_renderer = None
+
+
+def get_renderer() -> Renderer:
+    """Return the process-wide renderer used when none is passed to ``save``"""
+    global _default_renderer
+    if _default_renderer is None:
+        _default_renderer = Renderer()
+    return _default_renderer
+
+
+def set_renderer(renderer: Optional[Renderer]):
+    """Replace the process-wide renderer (``None`` resets to the default)"""
+    global _default_renderer
+    _default_renderer = renderer
+
+
+_captured_decks = None
+
+
+@contextmanager
+def capture_saves():
+    """
+    Collect the decks passed to ``save``/``export_pdf``/``export_images``
+    instead of writing them.
+
+    Used by ``pyslides serve`` to run an ordinary build script and pick up
+    its deck without touching the script's output files.
+
+    Examples
+    --------
+    >>> with capture_saves() as decks:
+    ...     runpy.run_path("deck.py", run_name="__main__")
+    >>> slides = decks[-1]
+    """
+    global _captured_decks
+    previous, _captured_decks = _captured_decks, []
+    try:
+        yield _captured_decks
+    finally:
+        _captured_decks = previous
 
 
 class Slides:
@@ -52,6 +211,57 @@ class Slides:
         Custom CSS to inject into the presentation
     config : dict, optional
         Reveal.js configuration options
+    renderer : Renderer, optional
+        Renderer used by :meth:`save`. Defaults to the shared process-wide
+        renderer returned by :func:`get_renderer`.
+    figure_cache : FigureCache or bool, optional
+        Persistent cache of converted figures, keyed on the figure, its
+        export settings and the rcParams used when saving it. ``True`` uses
+        the shared on-disk cache (see :func:`pyslides.cache.get_figure_cache`).
+        Default: False
+    defer_figures : bool, optional
+        Store figures as :class:`LazyFigure` handles and convert them only
+        when the deck is saved or exported (see :meth:`convert_figures`),
+        possibly on a pool. Changes made to a figure after ``add_slide``
+        then show up in the output, so do not reuse one figure object for
+        several slides. Default: False (convert in ``add_slide``)
+    release_figures : bool, optional
+        Close each Matplotlib figure (``pyplot.close``) and drop the deck's
+        reference to it as soon as it has been converted, so long scripts
+        do not accumulate open figures. Default: False
+    image_options : ImageOptions or dict, optional
+        Deck-wide encoding of Matplotlib figures (format, DPI policy,
+        quality, byte budget). Override per figure by passing
+        ``MatplotlibFigure(fig, ImageOptions(...))`` to ``add_slide``.
+    plotly_options : PlotlyOptions or dict, optional
+        Deck-wide reduction of Plotly figures (downsampling, WebGL, binary
+        arrays). Override per figure with ``PlotlyFigure(fig, PlotlyOptions(...))``.
+    fragment_cache : FragmentCache or bool, optional
+        Persistent cache of rendered slides. Each ``<section>`` is rendered
+        on its own and, with a cache, only re-rendered when the slide or the
+        slide template changed. ``True`` uses the shared on-disk cache.
+        Default: False
+    lazy_load : bool, optional
+        Keep figure payloads inert in ``<template>`` elements and only mount
+        them when Reveal shows their slide or a neighbour, purging them
+        (including ``Plotly.purge``) once navigation is far away. Load time
+        and browser memory then stay flat as the deck grows. The distances
+        are set with ``config['lazy_mount_distance']`` (default 1) and
+        ``config['lazy_purge_distance']`` (default 3). Default: False
+    compress_payloads : bool, optional
+        Store large figure payloads (Plotly JSON, Matplotlib SVG) gzip-compressed
+        and base64 encoded inside the HTML and expand them in the browser with
+        ``DecompressionStream``. Cuts transfer size on hosts that do not
+        compress. Already-compressed raster images are left as they are, and
+        so is any figure with images when saving with ``assets='sidecar'``.
+        Default: False
+    budget : SizeBudget, optional
+        Size limits checked on every :meth:`save` (see :meth:`stats`)
+    optimize_backgrounds : bool, BackgroundOptions or dict, optional
+        Scale slide backgrounds that are local image files down to the slide
+        size and re-encode them (WebP by default) when the deck is saved.
+        Results are cached on disk, each distinct image is stored once, and
+        the next slide's background is decoded ahead. Default: False
 
     Examples
     --------
@@ -72,7 +282,18 @@ class Slides:
         description: Optional[str] = None,
         theme: str = 'black',
         custom_css: Optional[str] = None,
-        config: Optional[Dict] = None
+        config: Optional[Dict] = None,
+        renderer: Optional[Renderer] = None,
+        figure_cache: Union[FigureCache, bool] = False,
+        defer_figures: bool = False,
+        release_figures: bool = False,
+        image_options: Union['ImageOptions', Dict, None] = None,
+        plotly_options: Union['PlotlyOptions', Dict, None] = None,
+        fragment_cache: Union[FragmentCache, bool] = False,
+        lazy_load: bool = False,
+        compress_payloads: bool = False,
+        budget: Optional[SizeBudget] = None,
+        optimize_backgrounds: Union[bool, BackgroundOptions, Dict] = False
     ):
         self.header = {
             'title': title or 'PySlides Presentation',
@@ -88,6 +309,25 @@ class Slides:
         self.custom_css = custom_css
         self.config = config or {}
         self.slides = []
+        self.renderer = renderer
+        self.figure_cache = figure_cache
+        self.defer_figures = defer_figures
+        self.release_figures = release_figures
+        self._deferred = {}
+        if isinstance(image_options, dict):
+            image_options = ImageOptions(**image_options)
+        self.image_options = image_options or ImageOptions()
+        if isinstance(plotly_options, dict):
+            plotly_options = PlotlyOptions(**plotly_options)
+        self.plotly_options = plotly_options
+        self.fragment_cache = fragment_cache
+        self.lazy_load = lazy_load
+        self.compress_payloads = compress_payloads
+        self.budget = budget
+        if isinstance(optimize_backgrounds, dict):
+            optimize_backgrounds = BackgroundOptions(**optimize_backgrounds)
+        self.optimize_backgrounds = optimize_backgrounds
+        self.chapters = []
 
     def add_slide(
         self,
@@ -116,7 +356,9 @@ class Slides:
         layout : str, optional
             Slide layout. Options: 'default', 'title', 'two-column', 'image-left', 'image-right'
         figure : plotly.graph_objects.Figure or matplotlib.figure.Figure, optional
-            Interactive figure to embed
+            Interactive figure to embed. Wrap a Matplotlib figure in
+            ``MatplotlibFigure(fig, ImageOptions(...))`` to override the deck's
+            image encoding for it.
         notes : str, optional
             Speaker notes (visible in presenter mode)
         background : str, optional
@@ -126,13 +368,24 @@ class Slides:
         transition : str, optional
             Slide transition effect: 'none', 'fade', 'slide', 'convex', 'concave', 'zoom'
         **kwargs : dict
-            Additional layout-specific parameters
+            Layout-specific fields (see :class:`~pyslides.slide.Slide` and its
+            subtypes), e.g. ``content_left`` for 'two-column' or ``author``
+            for 'title'. ``extra={...}`` carries anything else to a custom
+            template.
 
         Returns
         -------
         self : Slides
             Returns self for method chaining
 
+        Raises
+        ------
+        ValueError
+            If the layout is unknown
+        TypeError
+            If a field is not shown by the layout (e.g. ``content_left`` on a
+            'default' slide)
+
         Examples
         --------
         >>> slides.add_slide(title="Welcome", content="<p>Hello!</p>")
@@ -143,31 +396,168 @@ class Slides:
         ...     content_right="Right side"
         ... )
         """
-        slide = {
-            'title': title,
-            'subtitle': subtitle,
-            'content': content,
-            'layout': layout,
-            'notes': notes,
-            'background': background,
-            'background_color': background_color,
-            'transition': transition
-        }
+        slide = make_slide(layout, title=title, subtitle=subtitle, content=content, notes=notes,
+                           background=background, background_color=background_color,
+                           transition=transition, figure=figure, **kwargs)
 
         # Handle figure conversion
-        if figure is not None:
-            slide['figure'] = self._convert_figure(figure)
+        for key in FIGURE_FIELDS:
+            value = figure if key == 'figure' else kwargs.get(key)
+            if value is not None:
+                value = self._with_deck_options(value, layout)
+                if self.defer_figures:
+                    slide[key] = self._defer(value)
+                else:
+                    slide[key] = self._convert_figure(value)
+
+        self.slides.append(slide)
+        return self
 
-        # Add layout-specific parameters
-        for key, value in kwargs.items():
-            slide[key] = value
+    def add_chapter(self, title: Optional[str] = None):
+        """
+        Start a new chapter: slides added from now on belong to it.
 
-        # Remove None values
-        slide = {k: v for k, v in slide.items() if v is not None}
+        Chapters only matter for sharded saves (``save(..., shard=True)``),
+        where every chapter after the first is written to its own file and
+        loaded when navigation reaches it. Slides added before the first
+        ``add_chapter`` form an untitled opening chapter.
 
-        self.slides.append(slide)
+        Parameters
+        ----------
+        title : str, optional
+            Chapter title
+
+        Returns
+        -------
+        self : Slides
+            Returns self for method chaining
+
+        Examples
+        --------
+        >>> slides.add_chapter("Part 1: Basics").add_slide(title="Welcome")
+        """
+        self.chapters.append({'title': title, 'start': len(self.slides)})
+        return self
+
+    def chapter_ranges(self) -> List[tuple]:
+        """(title, first slide index, end index) of every non-empty chapter"""
+        bounds = [(chapter['title'], chapter['start']) for chapter in self.chapters]
+        if not bounds or bounds[0][1] > 0:
+            bounds.insert(0, (None, 0))
+        ranges = []
+        for index, (title, start) in enumerate(bounds):
+            end = bounds[index + 1][1] if index + 1 < len(bounds) else len(self.slides)
+            if end > start:
+                ranges.append((title, start, end))
+        return ranges
+
+    def dump(self, directory: str, workers: Optional[int] = None):
+        """
+        Write the deck to a directory that :meth:`load` reads back.
+
+        Figures are converted first and stored once each, by content hash, in
+        ``directory/blobs``; everything else goes to ``directory/manifest.json``.
+        Slide fields must be JSON values or HTML strings.
+
+        Parameters
+        ----------
+        directory : str
+            Deck directory (created if missing)
+        workers : int, optional
+            Convert deferred figures on a pool of this size first
+
+        Examples
+        --------
+        >>> slides.dump("build/part-03.deck")
+        """
+        self.convert_figures(workers=workers)
+        dump_deck(self, directory, FIGURE_FIELDS)
+        print(f"✓ Deck dumped to: {directory}")
+        return self
+
+    @classmethod
+    def load(cls, directory: str, **kwargs) -> 'Slides':
+        """
+        Read a deck written by :meth:`dump`.
+
+        Figures are not read into memory: they stay in the blob store and are
+        memory-mapped when the deck is rendered. ``kwargs`` go to the
+        constructor (e.g. ``renderer``, ``fragment_cache``).
+
+        Examples
+        --------
+        >>> slides = Slides.load("build/part-03.deck")
+        >>> slides.save("part-03.html")
+        """
+        manifest = read_manifest(directory)
+        options = dict(theme=manifest['theme'], custom_css=manifest['custom_css'],
+                       config=manifest['config'], lazy_load=manifest['lazy_load'],
+                       compress_payloads=manifest['compress_payloads'],
+                       optimize_backgrounds=manifest.get('optimize_backgrounds', False))
+        options.update(kwargs)
+        slides = cls(**options)
+        slides.header = manifest['header']
+        slides.chapters = manifest['chapters']
+        slides.slides = [make_slide(**slide) for slide in manifest['slides']]
+        return slides
+
+    def extend(self, other: Union['Slides', str], chapter: Optional[str] = None):
+        """
+        Append the slides (and chapters) of another deck or deck directory.
+
+        Parameters
+        ----------
+        other : Slides or str
+            Deck, or a directory written by :meth:`dump`
+        chapter : str, optional
+            Start a new chapter with this title for the appended slides
+
+        Returns
+        -------
+        self : Slides
+            Returns self for method chaining
+
+        Examples
+        --------
+        >>> slides.extend("build/part-03.deck", chapter="Part 3")
+        """
+        if not isinstance(other, Slides):
+            other = Slides.load(other)
+        if chapter is not None:
+            self.add_chapter(chapter)
+        offset = len(self.slides)
+        self.chapters += [dict(chapter, start=chapter['start'] + offset) for chapter in other.chapters]
+        self.slides += [slide.copy() for slide in other.slides]
         return self
 
+    @classmethod
+    def merge(cls, parts: Iterable[Union['Slides', str]], chapters: bool = False, **kwargs) -> 'Slides':
+        """
+        Assemble one deck from several decks or deck directories, in order.
+
+        The header, theme and config come from the first part unless given
+        in ``kwargs``. With ``chapters=True`` each part starts a chapter named
+        after its title.
+
+        Examples
+        --------
+        >>> deck = Slides.merge(sorted(glob.glob("build/*.deck")), title="Training")
+        """
+        parts = [part if isinstance(part, Slides) else cls.load(part) for part in parts]
+        if not parts:
+            raise ValueError("merge needs at least one deck")
+        first = parts[0]
+        options = dict(title=first.header['title'], author=first.header['author'],
+                       description=first.header['description'], theme=first.theme,
+                       custom_css=first.custom_css, config=dict(first.config),
+                       lazy_load=first.lazy_load, compress_payloads=first.compress_payloads,
+                       optimize_backgrounds=first.optimize_backgrounds)
+        options.update(kwargs)
+        deck = cls(**options)
+        for part in parts:
+            deck.extend(part, chapter=part.header['title'] if chapters else None)
+        return deck
+
     # Convenience method for backward compatibility
     def add(self, **kwargs):
         """Legacy method for adding slides (backward compatibility)"""
@@ -176,125 +566,1132 @@ class Slides:
             kwargs.pop('head_style')  # No longer needed with Reveal.js
         return self.add_slide(**kwargs)
 
-    def _convert_figure(self, figure: Any) -> str:
-        """Convert various figure types to HTML"""
-
-        # Plotly figure
-        if HAS_PLOTLY and isinstance(figure, go.Figure):
-            return PlotlyFigure(figure).to_html()
+    def _figure_cache(self) -> Optional[FigureCache]:
+        """Cache used for this deck's figures, or None when disabled"""
+        if self.figure_cache is False or self.figure_cache is None:
+            return None
+        if self.figure_cache is True:
+            return get_figure_cache()
+        return self.figure_cache
 
-        # Matplotlib figure
-        if HAS_MATPLOTLIB and isinstance(figure, matplotlib.figure.Figure):
-            return MatplotlibFigure(figure).to_html()
+    # Share of the slide width a figure gets in each layout
+    LAYOUT_WIDTHS = {'two-column': 1 / 2, 'image-left': 1 / 3, 'image-right': 1 / 3}
 
-        # Already HTML string
-        if isinstance(figure, str):
+    def _with_deck_options(self, figure: Any, layout: str) -> Any:
+        """Attach the deck's figure options and the figure's on-slide width"""
+        converter = figure_converter(figure)
+        if isinstance(converter, PlotlyFigure):
+            return replace(converter, options=converter.options or self.plotly_options)
+        if not isinstance(converter, MatplotlibFigure):
             return figure
+        width = self.config.get('width', 1920) * self.LAYOUT_WIDTHS.get(layout, 1)
+        return replace(converter,
+                       options=converter.options or self.image_options,
+                       target_width=converter.target_width or int(width))
 
-        raise ValueError(f"Unsupported figure type: {type(figure)}")
+    def _convert_figure(self, figure: Any) -> str:
+        """Convert various figure types to HTML"""
+        return convert_figure(figure, cache=self._figure_cache(),
+                              release=self.release_figures)
+
+    def _defer(self, figure: Any) -> 'LazyFigure':
+        """LazyFigure for ``figure``, warning if the same object is already waiting on a slide"""
+        handle = LazyFigure(figure, release=self.release_figures)
+        source = getattr(handle.converter, 'figure', None)
+        if source is not None:
+            earlier = self._deferred.get(id(source))
+            if earlier is not None and not earlier.converted and earlier.converter.figure is source:
+                print(f"Warning: Figure {source!r} was already added to an earlier slide and is not "
+                      f"converted yet; both slides will show its state at save time. "
+                      f"Add a new figure per slide or use defer_figures=False.")
+            self._deferred[id(source)] = handle
+        return handle
 
-    def save(self, output_path: str):
+    def _pending_figures(self) -> List:
+        """(slide index, LazyFigure) pairs still waiting for conversion"""
+        return [
+            (index, slide[key])
+            for index, slide in enumerate(self.slides)
+            for key in FIGURE_FIELDS
+            if isinstance(slide.get(key), LazyFigure) and not slide[key].converted
+        ]
+
+    def convert_figures(
+        self,
+        workers: Optional[int] = None,
+        executor: Union[str, concurrent.futures.Executor] = 'process'
+    ):
         """
-        Save the presentation to an HTML file.
+        Convert every deferred figure in the deck.
+
+        Called automatically by :meth:`save` and :meth:`export_pdf`. Cached
+        figures are resolved first; the remaining ones are rasterised
+        or serialised on a pool of ``workers`` and the results are put back
+        into their slides in order.
 
         Parameters
         ----------
-        output_path : str
-            Path to output HTML file
+        workers : int, optional
+            Number of pool workers. ``None`` or 1 converts on the calling thread.
+        executor : {'process', 'thread'} or concurrent.futures.Executor, optional
+            Kind of pool to start, or an existing executor to submit to (it is
+            not shut down afterwards). Default: 'process'
+
+        Raises
+        ------
+        FigureConversionError
+            If any figure failed; ``errors`` maps slide indices to exceptions.
+            Every other figure is still converted.
 
         Examples
         --------
-        >>> slides.save("presentation.html")
+        >>> slides = Slides(defer_figures=True)
+        >>> for fig in figures:
+        ...     slides.add_slide(figure=fig)
+        >>> slides.convert_figures(workers=8)
+        """
+        pending = self._pending_figures()
+        with phase('convert figures', figures=len(pending)):
+            convert_lazy_figures(pending, cache=self._figure_cache(),
+                                 workers=workers, executor=executor)
+        return self
+
+    def stats(self, workers: Optional[int] = None) -> DeckStats:
+        """
+        Size breakdown of the deck by slide, slide field and payload kind.
+
+        Figures are converted first (``workers`` as in :meth:`convert_figures`);
+        the deck is not rendered, so this is cheap enough for every build.
+
+        Examples
+        --------
+        >>> print(slides.stats().summary())
+        >>> slides.stats().by_type
+        {'image': 48211904, 'plotly': 1210331, 'html': 5120, 'text': 812}
         """
-        # Create Jinja2 template environment
-        file_loader = PackageLoader(__name__, 'data')
-        env = Environment(loader=file_loader)
-        template = env.get_template('base.html')
+        self.convert_figures(workers=workers)
+        return analyze(self.slides, FIGURE_FIELDS, self.custom_css)
 
-        # Render template
-        html_content = template.render(
+    def _template_context(self, sections: Optional[Iterable[str]] = None,
+                          runtime: Optional[Dict[str, Any]] = None,
+                          backgrounds: Optional[tuple] = None) -> Dict[str, Any]:
+        """Variables passed to ``base.html``"""
+        if runtime is None:
+            runtime = resolve_runtime('cdn', self.theme, self.runtime_features())
+        keys, urls = backgrounds or ({}, {})
+        # The first slide's background file is fetched before any script runs
+        first = urls.get(keys.get(self.slides[0].get('background'))) if self.slides and keys else None
+        return dict(
+            background_urls=urls,
+            preload_background=first if first and not first.startswith('data:') else None,
+            sections=sections if sections is not None else [],
+            runtime=runtime,
             slides=self.slides,
             header=self.header,
             theme=self.theme,
             custom_css=self.custom_css,
-            config=self.config
+            config=self.config,
+            **self._fragment_context()
         )
 
-        # Write to file
-        output_file = Path(output_path)
-        output_file.write_text(html_content, encoding='utf-8')
+    def runtime_features(self) -> set:
+        """
+        Libraries and Reveal.js plugins the deck needs (see
+        :func:`pyslides.bundle.detect_features`). Figures must be converted.
+        """
+        return detect_features(self.slides, self.config)
+
+    def _backgrounds(self, asset_writer: Optional[AssetWriter] = None, base_dir: Optional[Path] = None):
+        """
+        Optimised local background images, as ``(background → key, key → URL)``.
+
+        Relative paths are resolved from ``base_dir``, the directory the HTML
+        is saved to. URLs are data URIs, or sidecar files written by
+        ``asset_writer``. Both are empty unless ``optimize_backgrounds`` is on.
+        """
+        if not self.optimize_backgrounds:
+            return {}, {}
+        options = self.optimize_backgrounds
+        if not isinstance(options, BackgroundOptions):
+            options = BackgroundOptions()
+        width = options.width or self.config.get('width', 1920)
+        height = options.height or self.config.get('height', 1080)
+        images = optimize_backgrounds((slide.get('background') for slide in self.slides),
+                                      width, height, options, get_background_cache(), base_dir)
+        keys, urls = {}, {}
+        for background, (key, data, mime) in images.items():
+            keys[background] = key
+            if key not in urls:
+                urls[key] = (asset_writer.add(data, IMAGE_EXTENSIONS[mime]) if asset_writer is not None
+                             else f"data:{mime};base64,{base64.b64encode(data).decode()}")
+        return keys, urls
+
+    def _fragment_context(self) -> Dict[str, Any]:
+        """Deck-level variables passed to ``slide.html`` (part of every fragment key)"""
+        return dict(lazy_load=self.lazy_load, compress_payloads=self.compress_payloads)
+
+    def _fragment_cache(self) -> Optional[FragmentCache]:
+        """Cache used for rendered slides, or None when disabled"""
+        if self.fragment_cache is False or self.fragment_cache is None:
+            return None
+        if self.fragment_cache is True:
+            return get_fragment_cache()
+        return self.fragment_cache
+
+    def _render_sections(self, renderer: Renderer, backgrounds: Optional[Dict[str, str]] = None,
+                         sidecar: bool = False) -> Iterator[str]:
+        """
+        Render each slide to its ``<section>``, reusing cached fragments.
+        ``backgrounds`` maps optimised backgrounds to their keys (see
+        :meth:`_backgrounds`); ``sidecar`` keeps images out of packed payloads.
+        """
+        backgrounds = backgrounds or {}
+        cache = self._fragment_cache()
+        context = dict(self._fragment_context(), sidecar_assets=sidecar)
+        template = renderer.get_template('slide.html')
+        if cache is not None:
+            prefix = stable_hash(renderer.template_digest('slide.html'),
+                                 json.dumps(context, sort_keys=True, default=repr))
+        trace = current_trace()
+        for index, slide in enumerate(self.slides):
+            start = trace.now() if trace is not None else None
+            background_key = backgrounds.get(slide.get('background'))
+            key = (stable_hash(prefix, _slide_digest(slide), background_key or '')
+                   if cache is not None else None)
+            html = cache.get(key) if key is not None else None
+            cached = html is not None
+            if html is None:
+                html = template.render(slide=slide, background_key=background_key, **context)
+                if key is not None:
+                    cache.put(key, html)
+            if trace is not None:
+                duration = trace.now() - start
+                record = trace.slide(index)
+                record.update(title=slide.get('title'), render_seconds=duration)
+                trace.add_span('render slide', start, duration, 'render', slide=index, cached=cached)
+            yield html
+
+    def _shard_sections(self, sections: Iterator[str], asset_writer: AssetWriter) -> Iterator[str]:
+        """
+        Keep the first chapter in the shell; write every other chapter to a
+        file and leave one placeholder ``<section>`` per slide in its place,
+        so Reveal's slide numbers and URL hashes are right before it loads.
+        """
+        for index, (_, start, end) in enumerate(self.chapter_ranges()):
+            chapter = list(itertools.islice(sections, end - start))
+            if index == 0:
+                yield from chapter
+                continue
+            url = asset_writer.add('\n'.join(chapter).encode('utf-8'), 'html', stem=f'chapter-{index}')
+            placeholder = f'<section data-pyslides-chapter="{html_escape(url)}"></section>'
+            for _ in range(end - start):
+                yield placeholder
+
+    def save(
+        self,
+        output_path: Union[str, os.PathLike, io.IOBase],
+        renderer: Optional[Renderer] = None,
+        buffer_size: int = 1 << 16,
+        workers: Optional[int] = None,
+        assets: str = 'inline',
+        assets_dir: Optional[str] = None,
+        assets_url: Optional[str] = None,
+        bundle: str = 'cdn',
+        vendor_dir: Optional[str] = None,
+        shard: bool = False,
+        precompress: Union[bool, str, Iterable[str]] = False,
+        budget: Optional[SizeBudget] = None
+    ):
+        """
+        Save the presentation to an HTML file.
+
+        The document is streamed to its destination chunk by chunk, so peak
+        memory is bounded by the largest slide rather than the whole deck.
+
+        Parameters
+        ----------
+        output_path : str, path-like or file-like
+            Path to output HTML file, or any object with a ``write`` method
+            (an open binary or text file, an HTTP response body, ...). Binary
+            writers receive UTF-8 encoded bytes; file-like objects are not
+            closed.
+        renderer : Renderer, optional
+            Renderer to use for this save only. Falls back to the renderer
+            given to the constructor, then to the process-wide one.
+        buffer_size : int, optional
+            Approximate number of characters written per chunk
+        workers : int, optional
+            Convert deferred figures on a process pool of this size first
+            (see :meth:`convert_figures`)
+        assets : str, optional
+            'inline' embeds images as base64 data URIs, giving one
+            self-contained file. 'sidecar' writes each distinct image once to
+            ``assets_dir`` under a content-hash name and links it with
+            ``<img src>``. Default: 'inline'
+        assets_dir : str, optional
+            Image directory for 'sidecar' mode. Defaults to ``<name>_assets``
+            next to the output file; required when saving to a stream.
+        assets_url : str, optional
+            URL prefix for sidecar images. Defaults to the path of
+            ``assets_dir`` relative to the output file.
+        bundle : {'cdn', 'inline', 'sidecar'}, optional
+            Where the Reveal.js, plotly.js and MathJax runtime comes from.
+            'cdn' links the public CDNs. 'inline' embeds the runtime in the
+            document, giving a deck that opens without network access.
+            'sidecar' writes each runtime file once, minified and under a
+            content-hash name, to ``assets_dir``, where several decks can
+            share it. Both offline modes read the runtime from
+            ``vendor_dir`` and never touch the network. Only the libraries and
+            plugins the deck uses are included. Default: 'cdn'
+        vendor_dir : str, optional
+            Local copy of the runtime for offline bundles. Defaults to
+            ``$PYSLIDES_VENDOR_DIR`` or the ``vendor`` directory of the cache,
+            as filled by ``pyslides vendor``.
+        shard : bool, optional
+            Write a small shell document holding the first chapter plus one
+            content-hashed file per further chapter (see :meth:`add_chapter`)
+            to ``assets_dir``. The shell fetches a chapter when navigation
+            reaches it and prefetches the next one, so the initial parse stays
+            small and each chapter is cached on its own. Chapters are fetched,
+            so the deck must be served over HTTP. Default: False
+        precompress : bool, str or iterable of str, optional
+            Also write ``.gz`` and/or ``.br`` copies of the deck and of its
+            text sidecar files ('gzip', 'br', or True for both), compressed
+            while the deck streams out, for static hosts that serve
+            precompressed files. 'br' needs the ``brotli`` package.
+            Default: False
+        budget : SizeBudget, optional
+            Size limits to warn about or enforce; defaults to the deck's
+            ``budget``. Slide and figure limits are checked before rendering,
+            the total against the bytes written.
 
-        print(f"✓ Presentation saved to: {output_path}")
+        Examples
+        --------
+        >>> slides.save("presentation.html")
+        >>> with open("presentation.html", "wb") as f:
+        ...     slides.save(f)
+        >>> slides.save("presentation.html", assets='sidecar')
+        >>> slides.save("offline.html", bundle='inline')
+        >>> slides.save("training/index.html", shard=True)
+        >>> slides.save("presentation.html", precompress=('gzip', 'br'))
+        >>> slides.save("presentation.html", budget=SizeBudget(max_figure=2_000_000, action='error'))
+        """
+        if _captured_decks is not None:
+            _captured_decks.append(self)
+            return None
+        label = getattr(output_path, 'name', 'stream') if hasattr(output_path, 'write') else str(output_path)
+        with traced_deck(label):
+            messages = self._save(output_path, renderer, buffer_size, workers, assets, assets_dir,
+                                  assets_url, bundle, vendor_dir, shard, precompress, budget)
+        for message in messages:
+            print(message)
         return None
 
-    def export_pdf(self, output_path: str, html_path: Optional[str] = None):
+    def to_html(self, print_view: bool = False, base_dir: Optional[str] = None, **save_options) -> str:
+        """
+        Render the deck to an HTML string, without writing any file.
+
+        Parameters
+        ----------
+        print_view : bool, optional
+            Open in Reveal's print view (one page per slide), as PDF export
+            needs. Default: False
+        base_dir : str, optional
+            Directory the HTML will be opened from: relative local background
+            paths are resolved from it. Default: the working directory
+        **save_options
+            Options of :meth:`save` (``bundle``, ``renderer``, ``workers``, ...)
+
+        Examples
+        --------
+        >>> html = slides.to_html(bundle='inline')
+        """
+        buffer = io.StringIO()
+        with traced_deck('html'):
+            self._save(buffer, print_view=print_view, base_dir=base_dir, **save_options)
+        return buffer.getvalue()
+
+    def _save(
+        self,
+        output_path: Union[str, os.PathLike, io.IOBase],
+        renderer: Optional[Renderer] = None,
+        buffer_size: int = 1 << 16,
+        workers: Optional[int] = None,
+        assets: str = 'inline',
+        assets_dir: Optional[str] = None,
+        assets_url: Optional[str] = None,
+        bundle: str = 'cdn',
+        vendor_dir: Optional[str] = None,
+        shard: bool = False,
+        precompress: Union[bool, str, Iterable[str]] = False,
+        budget: Optional[SizeBudget] = None,
+        print_view: bool = False,
+        base_dir: Optional[Path] = None
+    ) -> List[str]:
+        """Body of :meth:`save`; returns the progress messages instead of printing them"""
+        if assets not in ('inline', 'sidecar'):
+            raise ValueError(f"Unknown assets mode '{assets}'. Options: 'inline', 'sidecar'")
+        if bundle not in BUNDLE_MODES:
+            raise ValueError(f"Unknown bundle mode '{bundle}'. Options: {list(BUNDLE_MODES)}")
+        to_stream = hasattr(output_path, 'write')
+        formats = precompress_formats(precompress)
+        if formats and to_stream:
+            raise ValueError("precompress needs an output path, not a stream")
+
+        asset_writer = None
+        if assets == 'sidecar' or bundle == 'sidecar' or shard:
+            if assets_dir is None:
+                if to_stream:
+                    raise ValueError("assets_dir is required for sidecar assets when saving to a stream")
+                assets_dir = default_assets_dir(output_path)
+            if assets_url is None:
+                assets_url = relative_url(
+                    assets_dir, None if to_stream else Path(output_path).absolute().parent)
+            asset_writer = AssetWriter(assets_dir, assets_url, precompress=formats)
+
+        self.convert_figures(workers=workers)
+        budget = budget if budget is not None else self.budget
+        if budget is not None:
+            with phase('check budget'):
+                try:
+                    budget.enforce(budget.content_violations(self.stats()))
+                except BaseException:
+                    if asset_writer is not None:
+                        asset_writer.close()
+                    raise
+        try:
+            with phase('resolve runtime', bundle=bundle):
+                runtime = resolve_runtime(bundle, self.theme, self.runtime_features(),
+                                          vendor_dir, asset_writer)
+        except BaseException:
+            if asset_writer is not None:
+                asset_writer.close()
+            raise
+        try:
+            with phase('optimize backgrounds'):
+                if base_dir is None and not to_stream:
+                    base_dir = Path(output_path).absolute().parent
+                backgrounds = self._backgrounds(asset_writer if assets == 'sidecar' else None, base_dir)
+        except BaseException:
+            if asset_writer is not None:
+                asset_writer.close()
+            raise
+        renderer = renderer or self.renderer or get_renderer()
+        sections = self._render_sections(renderer, backgrounds[0], sidecar=assets == 'sidecar')
+        if assets == 'sidecar':
+            sections = (asset_writer.externalize(section) for section in sections)
+        trace = current_trace()
+        if trace is not None:
+            sections = trace.count_slides(sections)
+        if shard:
+            sections = self._shard_sections(sections, asset_writer)
+        chunks = renderer.stream('base.html', buffer_size=buffer_size, sharded=shard,
+                                 print_view=print_view,
+                                 **self._template_context(sections, runtime, backgrounds))
+
+        try:
+            # Slides render lazily as the document streams, so this phase
+            # contains the per-slide render spans
+            with phase('render and write'):
+                if to_stream:
+                    size = _write_chunks(output_path, chunks)
+                    output_path = getattr(output_path, 'name', 'stream')
+                    if budget is not None:
+                        budget.enforce(budget.total_violations(size))
+                else:
+                    # Write next to the destination and swap it in once complete,
+                    # so a failing render (or budget) never replaces the deck
+                    writer = CompressedWriter(output_path, formats)
+                    try:
+                        size = _write_chunks(writer, chunks)
+                        if budget is not None:
+                            budget.enforce(budget.total_violations(size))
+                    except BaseException:
+                        writer.discard()
+                        raise
+                    writer.commit()
+        finally:
+            if asset_writer is not None:
+                with phase('write assets'):
+                    written = asset_writer.close()
+
+        if trace is not None:
+            if asset_writer is not None:
+                trace.assets.update(written)
+            if not to_stream:
+                trace.outputs.update((str(path), path.stat().st_size) for path in writer.paths)
+
+        messages = [f"✓ Presentation saved to: {output_path}"]
+        if formats:
+            messages.append(f"✓ Precompressed copies: {', '.join(formats)}")
+        if asset_writer is not None:
+            messages.append(f"✓ {len(written)} asset file(s) saved to: {assets_dir}")
+        return messages
+
+    def export_pdf(self, output_path: str, html_path: Optional[str] = None,
+                   exporter: Optional[Any] = None, **save_options):
         """
         Export presentation to PDF (requires playwright).
 
+        The deck is rendered in memory and printed as soon as it has finished
+        rendering; no HTML file is written. Relative paths in the deck resolve
+        from the PDF's directory. For many decks, share one browser
+        with :func:`pyslides.export.export_pdfs` or a
+        :class:`~pyslides.export.PDFExporter`.
+
         Parameters
         ----------
         output_path : str
             Path to output PDF file
         html_path : str, optional
-            Path to HTML file (if None, will save to temp file first)
+            Print this saved HTML file instead of rendering the deck
+        exporter : PDFExporter, optional
+            Exporter (not yet started) to print with, e.g. with a custom
+            backend, timeout or page format. Closed afterwards.
+        **save_options
+            Options for rendering the HTML (see :meth:`save`)
 
         Examples
         --------
         >>> slides.export_pdf("presentation.pdf")
+        >>> slides.export_pdf("offline.pdf", bundle='inline')
         """
-        try:
-            from playwright.sync_api import sync_playwright
-        except ImportError:
-            raise ImportError(
-                "PDF export requires playwright. Install with: "
-                "pip install pyslides[export]"
-            )
-
-        # Save HTML first if not provided
-        if html_path is None:
-            html_path = output_path.replace('.pdf', '.html')
-            self.save(html_path)
-
-        # Convert to PDF using Playwright
-        with sync_playwright() as p:
-            browser = p.chromium.launch()
-            page = browser.new_page()
-            page.goto(f"file://{Path(html_path).absolute()}?print-pdf")
-            page.wait_for_timeout(2000)  # Wait for content to load
-            page.pdf(path=output_path, format='A4', landscape=True)
-            browser.close()
+        if _captured_decks is not None:
+            _captured_decks.append(self)
+            return None
+        from pyslides.export import PDFExporter, run_coroutine
+
+        if exporter is None:
+            exporter = PDFExporter(pages=1, save_options=save_options)
+        elif save_options:
+            exporter.save_options = dict(exporter.save_options, **save_options)
+
+        async def export():
+            async with exporter:
+                return await exporter.export(self, output_path, html_path=html_path)
+        pdf = run_coroutine(export())
+
+        trace = current_trace()
+        if trace is not None:
+            trace.outputs[str(output_path)] = len(pdf)
 
         print(f"✓ PDF exported to: {output_path}")
 
+    def export_images(
+        self,
+        output_dir: str,
+        indices: Optional[Iterable[int]] = None,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        thumbnail_width: Optional[int] = None,
+        pages: int = 4,
+        exporter: Optional[Any] = None,
+        **save_options
+    ) -> List[Any]:
+        """
+        Export slides as PNG images (requires playwright).
+
+        Slides are captured on a pool of browser pages into content-hashed
+        files (``slide-003-<hash>.png``), so slides that did not change since
+        the last export are skipped. See :class:`pyslides.export.ImageExporter`.
+
+        Parameters
+        ----------
+        output_dir : str
+            Directory for the images (created if missing)
+        indices : iterable of int, optional
+            Slides to export (0-based). Default: all
+        width, height : int, optional
+            Image size in pixels. Default: the ``width``/``height`` config
+        thumbnail_width : int, optional
+            Also write thumbnails this many pixels wide
+        pages : int, optional
+            Number of browser pages capturing concurrently
+        exporter : ImageExporter, optional
+            Exporter (not yet started) to capture with; the other capture
+            options are then taken from it. Closed afterwards.
+        **save_options
+            Options for rendering the HTML (see :meth:`save`)
+
+        Returns
+        -------
+        list of SlideImage
+            Path, thumbnail path and whether it was skipped, per slide
+
+        Examples
+        --------
+        >>> slides.export_images("previews", thumbnail_width=320)
+        >>> slides.export_images("cover", indices=[0], width=1200, height=630)
+        """
+        if _captured_decks is not None:
+            _captured_decks.append(self)
+            return []
+        from pyslides.export import ImageExporter, run_coroutine
+
+        if exporter is None:
+            exporter = ImageExporter(width=width, height=height, thumbnail_width=thumbnail_width,
+                                     pages=pages, save_options=save_options)
+
+        async def export():
+            # The exporter starts the browser only if some slide changed
+            try:
+                return await exporter.export(self, output_dir, indices)
+            finally:
+                await exporter.close()
+        images = run_coroutine(export())
+
+        skipped = sum(image.skipped for image in images)
+        print(f"✓ {len(images) - skipped} slide image(s) exported to: {output_dir}"
+              + (f" ({skipped} unchanged)" if skipped else ""))
+        return images
+
+
+# Slide fields that may hold a figure
+FIGURE_FIELDS = ('figure', 'figure_left', 'figure_right')
+
+
+class FigureConversionError(RuntimeError):
+    """One or more figures of a deck failed to convert"""
+
+    def __init__(self, errors: Dict[int, BaseException]):
+        self.errors = errors
+        details = '; '.join(f"slides[{index}]: {error!r}" for index, error in sorted(errors.items()))
+        super().__init__(f"Failed to convert {len(errors)} figure(s): {details}")
+
+
+def figure_converter(figure: Any):
+    """Return the converter for ``figure``, or None if it is already HTML"""
+
+    # Already wrapped, possibly with per-figure options
+    if isinstance(figure, (PlotlyFigure, MatplotlibFigure)):
+        return figure
+
+    # Already HTML string
+    if isinstance(figure, str):
+        return None
+
+    # Plotly, Matplotlib and registered figure types. A figure can only be an
+    # instance of a class whose module is loaded, so modules missing from
+    # sys.modules are skipped without importing anything.
+    for module_name, class_name, converter in FIGURE_TYPES:
+        module = sys.modules.get(module_name)
+        if module is not None and isinstance(figure, getattr(module, class_name)):
+            return converter(figure)
+
+    raise ValueError(f"Unsupported figure type: {type(figure)}")
+
+
+class LazyFigure:
+    """
+    A figure whose conversion to HTML is deferred.
+
+    Renders as its HTML inside templates, converting on first use if nobody
+    converted it before. With ``release=True`` the figure is closed in
+    pyplot and dropped once converted, leaving only the HTML behind.
+    """
+
+    __slots__ = ('converter', 'html', 'release', '_key')
+
+    def __init__(self, figure: Any, release: bool = False):
+        self.converter = figure_converter(figure)
+        self.html = figure if self.converter is None else None
+        self.release = release
+        self._key = None
+
+    @property
+    def converted(self) -> bool:
+        return self.html is not None
+
+    def cache_key(self) -> Optional[str]:
+        if self._key is None and self.converter is not None:
+            self._key = self.converter.cache_key()
+        return self._key
+
+    def digest(self) -> str:
+        """Hash identifying the figure's HTML"""
+        return self._key or stable_hash(str(self))
+
+    def from_cache(self, cache: Optional[FigureCache]) -> bool:
+        """Take the HTML from ``cache`` if present; return whether it was"""
+        if self.converted:
+            return True
+        key = self.cache_key() if cache is not None else None
+        if key is not None:
+            self.html = cache.get(key)
+            if self.converted:
+                self._release()
+        return self.converted
+
+    def set_html(self, html: str, cache: Optional[FigureCache] = None):
+        """Record the converted HTML, storing it in ``cache`` too"""
+        self.html = html
+        key = self.cache_key() if cache is not None else None
+        if key is not None:
+            cache.put(key, html)
+        self._release()
+
+    def _release(self):
+        if self.release and self.converter is not None:
+            self.converter.close()
+            self.converter = None
+
+    def convert(self, cache: Optional[FigureCache] = None) -> str:
+        """Convert on the calling thread (through ``cache`` if given)"""
+        if not self.from_cache(cache):
+            self.set_html(self.converter.to_html(), cache)
+        return self.html
+
+    def __str__(self) -> str:
+        return self.convert()
+
+    __html__ = __str__
+
+
+def _slide_digest(slide: Slide) -> str:
+    """Stable hash of a slide's content"""
+    parts = []
+    for key in sorted(slide):
+        value = slide[key]
+        if isinstance(value, (LazyFigure, BlobFigure)):
+            value = value.digest()
+        elif not isinstance(value, str):
+            value = repr(value)
+        parts += [key, value]
+    return stable_hash(*parts)
+
+
+def convert_figure(figure: Any, cache: Optional[FigureCache] = None,
+                   release: bool = False) -> str:
+    """
+    Convert a Plotly figure, Matplotlib figure or HTML string to HTML.
+
+    When a cache is given, the result is looked up by a hash of the figure
+    and its conversion settings, and only converted on a miss. ``release``
+    closes a Matplotlib figure afterwards.
+    """
+    return LazyFigure(figure, release=release).convert(cache)
+
+
+def _to_html(converter, timed: bool = False):
+    """
+    Pool entry point (module level so process pools can pickle it). ``timed``
+    also returns the wall-clock start, duration and worker for the trace.
+    """
+    if not timed:
+        return converter.to_html()
+    start = time.time()
+    html = converter.to_html()
+    worker = threading.get_ident() if threading.current_thread() is not threading.main_thread() else os.getpid()
+    return html, start, time.time() - start, worker
+
+
+def convert_lazy_figures(
+    items: List,
+    cache: Optional[FigureCache] = None,
+    workers: Optional[int] = None,
+    executor: Union[str, concurrent.futures.Executor] = 'process'
+):
+    """
+    Convert ``(slide index, LazyFigure)`` pairs, on a pool if ``workers`` > 1.
+
+    Raises FigureConversionError after every figure has been attempted.
+    """
+    errors = {}
+    misses = []
+    duplicates = {}
+    trace = current_trace()
+
+    def fail(index, handle, error):
+        errors.setdefault(index, error)
+        for duplicate_index, _ in duplicates.get(handle._key, ()):
+            errors.setdefault(duplicate_index, error)
+
+    for index, handle in items:
+        try:
+            # Identical figures within the batch are converted only once
+            key = handle.cache_key() if cache is not None and not handle.converted else None
+            if key is not None and key in duplicates:
+                duplicates[key].append((index, handle))
+            elif not handle.from_cache(cache):
+                misses.append((index, handle))
+                if key is not None:
+                    duplicates[key] = []
+        except Exception as error:
+            errors[index] = error
+
+    if isinstance(executor, concurrent.futures.Executor):
+        pool, owned = executor, False
+    elif workers and workers > 1 and len(misses) > 1:
+        pool_class = {'process': concurrent.futures.ProcessPoolExecutor,
+                      'thread': concurrent.futures.ThreadPoolExecutor}[executor]
+        pool, owned = pool_class(max_workers=workers), True
+    else:
+        pool, owned = None, False
+
+    try:
+        if pool is None:
+            results = []
+            for index, handle in misses:
+                start = trace.now() if trace is not None else None
+                try:
+                    results.append((index, handle, handle.converter.to_html()))
+                except Exception as error:
+                    fail(index, handle, error)
+                if trace is not None:
+                    _trace_conversion(trace, index, handle, start, trace.now() - start)
+        else:
+            futures = [(index, handle, pool.submit(_to_html, handle.converter, trace is not None))
+                       for index, handle in misses]
+            results = []
+            for index, handle, future in futures:
+                try:
+                    html = future.result()
+                except Exception as error:
+                    fail(index, handle, error)
+                    continue
+                if trace is not None:
+                    html, start, duration, worker = html
+                    _trace_conversion(trace, index, handle, trace.from_wall(start), duration, worker)
+                results.append((index, handle, html))
+    finally:
+        if owned:
+            pool.shutdown()
+
+    for index, handle, html in results:
+        handle.set_html(html, cache)
+        for _, duplicate in duplicates.get(handle._key, ()):
+            duplicate.set_html(html)
+
+    if errors:
+        raise FigureConversionError(errors)
+
+
+def _trace_conversion(trace, index: int, handle: 'LazyFigure', start: float, duration: float,
+                      worker: Optional[int] = None):
+    trace.slide(index)['convert_seconds'] += duration
+    trace.add_span('convert figure', start, duration, 'figure', thread=worker, slide=index,
+                   type=type(handle.converter).__name__)
+
+
+def _write_chunks(writer: Any, chunks: Iterable[str]) -> int:
+    """
+    Write text chunks to a text stream, or UTF-8 encoded to anything else.
+    Returns the UTF-8 size of what was written, in bytes.
+    """
+    size = 0
+    if isinstance(writer, io.TextIOBase):
+        for chunk in chunks:
+            writer.write(chunk)
+            size += len(chunk) if chunk.isascii() else len(chunk.encode('utf-8'))
+    else:
+        for chunk in chunks:
+            data = chunk.encode('utf-8')
+            writer.write(data)
+            size += len(data)
+    return size
+
+
+@dataclass
+class PlotlyOptions:
+    """
+    Optional reduction of Plotly figures before embedding.
+
+    Parameters
+    ----------
+    max_points : int, optional
+        Downsample scatter traces longer than this to about this many points
+    method : {'lttb', 'minmax'}, optional
+        Largest-Triangle-Three-Buckets, or the min and max of each bucket.
+        Default: 'lttb'
+    webgl_threshold : int, optional
+        Render scatter traces with more points than this with ``scattergl``
+    binary : bool, optional
+        Embed long numeric arrays as base64 typed arrays rather than decimal
+        text. Default: True
+
+    Examples
+    --------
+    >>> Slides(plotly_options=PlotlyOptions(max_points=5000, webgl_threshold=2000))
+    """
+    max_points: Optional[int] = None
+    method: str = 'lttb'
+    webgl_threshold: Optional[int] = None
+    binary: bool = True
+
+    def __post_init__(self):
+        if self.method not in ('lttb', 'minmax'):
+            raise ValueError(f"Unknown downsampling method '{self.method}'. Options: 'lttb', 'minmax'")
+
 
 @dataclass
 class PlotlyFigure:
     """Convert Plotly figure to HTML"""
     figure: Any
+    options: Optional[PlotlyOptions] = None
+
+    html_args = dict(
+        full_html=False,
+        include_mathjax=False,
+        include_plotlyjs=False,
+        config={'responsive': True}
+    )
+
+    def __post_init__(self):
+        self.report = None
+
+    def cache_key(self) -> Optional[str]:
+        """Hash of the figure JSON and the HTML conversion settings"""
+        import plotly
+        return stable_hash('plotly', plotly.__version__,
+                           json.dumps(self.html_args, sort_keys=True),
+                           repr(self.options), self.figure.to_json())
 
     def to_html(self) -> str:
         """Convert to HTML string"""
-        plotly_html_args = dict(
-            full_html=False,
-            include_mathjax=False,
-            include_plotlyjs=False,
-            config={'responsive': True}
-        )
-        return self.figure.to_html(**plotly_html_args)
+        if self.options is None:
+            return self.figure.to_html(**self.html_args)
+
+        import plotly.io
+        from pyslides.downsample import reduce_figure
+
+        figure = self.figure.to_plotly_json()
+        self.report = reduce_figure(figure, max_points=self.options.max_points,
+                                    method=self.options.method,
+                                    webgl_threshold=self.options.webgl_threshold,
+                                    binary=self.options.binary)
+        html = plotly.io.to_html(figure, validate=False, **self.html_args)
+        if self.report.dropped:
+            html = f"<!-- pyslides: {self.report} -->\n{html}"
+        return html
+
+    def close(self):
+        """Nothing to free for Plotly figures"""
+
+
+@dataclass
+class ImageOptions:
+    """
+    How Matplotlib figures are encoded.
+
+    Parameters
+    ----------
+    format : str, optional
+        'png', 'webp', 'jpeg' or 'svg'. Default: 'png'
+    dpi : int or 'auto', optional
+        Resolution passed to ``savefig``. 'auto' picks the DPI at which the
+        figure is as wide, in pixels, as the space it gets on the slide
+        (from the deck's ``config['width']`` and the slide layout).
+        Default: 150
+    quality : int, optional
+        Encoder quality (1-100) for 'webp' and 'jpeg'. Default: Pillow's
+    max_bytes : int, optional
+        Byte budget per figure. When exceeded, quality (lossy formats) and
+        then DPI are stepped down until the image fits.
+    rasterize_threshold : int, optional
+        SVG only: lines and collections with more points than this are
+        rasterised (at ``dpi``) while axes, ticks and text stay vector.
+        ``None`` keeps everything vector. Default: 5000
+    vector_max_complexity : int, optional
+        SVG only: figures with more data points than this in total are
+        written as ``raster_format`` instead. Default: None
+    raster_format : str, optional
+        Format used when ``vector_max_complexity`` is exceeded. Default: 'png'
+
+    Examples
+    --------
+    >>> Slides(image_options=ImageOptions(format='webp', quality=80, dpi='auto'))
+    >>> slides.add_slide(figure=MatplotlibFigure(fig, ImageOptions(format='svg')))
+    """
+    format: str = 'png'
+    dpi: Union[int, str] = 150
+    quality: Optional[int] = None
+    max_bytes: Optional[int] = None
+    rasterize_threshold: Optional[int] = 5000
+    vector_max_complexity: Optional[int] = None
+    raster_format: str = 'png'
+
+    MIME_TYPES = {'png': 'image/png', 'webp': 'image/webp',
+                  'jpeg': 'image/jpeg', 'svg': 'image/svg+xml'}
+
+    def __post_init__(self):
+        if self.format == 'jpg':
+            self.format = 'jpeg'
+        for name in ('format', 'raster_format'):
+            if getattr(self, name) not in self.MIME_TYPES:
+                raise ValueError(f"Unsupported image format '{getattr(self, name)}'. "
+                                 f"Options: {list(self.MIME_TYPES)}")
+        if self.dpi != 'auto' and not isinstance(self.dpi, (int, float)):
+            raise ValueError(f"dpi must be a number or 'auto', not {self.dpi!r}")
+
+    @property
+    def mime(self) -> str:
+        return self.MIME_TYPES[self.format]
+
+
+def _artist_points(artist: Any) -> int:
+    """Number of data points drawn by a line or collection"""
+    if hasattr(artist, 'get_xydata'):
+        return len(artist.get_xydata())
+    offsets = artist.get_offsets() if hasattr(artist, 'get_offsets') else ()
+    if len(offsets) > 1:
+        return len(offsets)
+    return sum(len(path.vertices) for path in artist.get_paths())
+
+
+# rcParams read while a figure is saved rather than when it is drawn
+SAVEFIG_RC_PREFIXES = ('savefig.', 'svg.', 'agg.', 'path.', 'text.', 'mathtext.', 'font.')
+
+
+def _savefig_rc() -> str:
+    """The rcParams that affect ``savefig`` output, for cache keys"""
+    import matplotlib
+    return repr(sorted((key, value) for key, value in matplotlib.rcParams.items()
+                       if key.startswith(SAVEFIG_RC_PREFIXES)))
+
+
+def _data_artists(figure: Any) -> Iterator:
+    """(artist, points) for every line and collection of a figure"""
+    for axes in figure.get_axes():
+        for artist in list(axes.lines) + list(axes.collections):
+            yield artist, _artist_points(artist)
 
 
 @dataclass
 class MatplotlibFigure:
     """Convert Matplotlib figure to HTML (as base64 encoded image)"""
     figure: Any
+    options: Optional[ImageOptions] = None
+    target_width: Optional[int] = None
+
+    MIN_DPI = 50
+    MAX_DPI = 300
+    QUALITY_STEPS = (90, 80, 70, 60, 50, 40, 30)
+
+    def _options(self) -> ImageOptions:
+        return self.options or ImageOptions()
+
+    def complexity(self) -> int:
+        """Total number of data points in the figure's lines and collections"""
+        return sum(points for _, points in _data_artists(self.figure))
+
+    def resolved_options(self) -> ImageOptions:
+        """Options after falling back to raster output for overly complex SVGs"""
+        options = self._options()
+        if (options.format == 'svg' and options.vector_max_complexity is not None
+                and self.complexity() > options.vector_max_complexity):
+            return replace(options, format=options.raster_format)
+        return options
+
+    def _dpi(self, options: Optional[ImageOptions] = None) -> float:
+        """DPI from the options, resolving 'auto' against the target width"""
+        dpi = (options or self._options()).dpi
+        if dpi != 'auto':
+            return dpi
+        width_inches = self.figure.get_size_inches()[0]
+        dpi = (self.target_width or 1920) / width_inches
+        return float(min(max(round(dpi), self.MIN_DPI), self.MAX_DPI))
+
+    def savefig_args(self, dpi: Optional[float] = None, quality: Optional[int] = None,
+                     options: Optional[ImageOptions] = None) -> Dict[str, Any]:
+        """Keyword arguments for ``savefig``"""
+        options = options or self._options()
+        args = dict(format=options.format, bbox_inches='tight', dpi=dpi or self._dpi(options))
+        quality = quality or options.quality
+        if quality is not None and options.format in ('webp', 'jpeg'):
+            args['pil_kwargs'] = {'quality': quality}
+        return args
+
+    def cache_key(self) -> Optional[str]:
+        """Hash of the figure state, encoding settings and savefig rcParams (None if unpicklable)"""
+        state = pickle_digest(self.figure)
+        if state is None:
+            return None
+        import matplotlib
+        return stable_hash('matplotlib', matplotlib.__version__,
+                           json.dumps(self.savefig_args(), sort_keys=True),
+                           repr(self._options()), _savefig_rc(), state)
+
+    @contextmanager
+    def _rasterized(self, options: ImageOptions):
+        """Temporarily rasterise heavy artists of a vector figure"""
+        changed = []
+        if options.format == 'svg' and options.rasterize_threshold is not None:
+            for artist, points in _data_artists(self.figure):
+                if points > options.rasterize_threshold and not artist.get_rasterized():
+                    artist.set_rasterized(True)
+                    changed.append(artist)
+        try:
+            yield changed
+        finally:
+            for artist in changed:
+                artist.set_rasterized(False)
+
+    def _encode(self, options: ImageOptions, **savefig_args) -> bytes:
+        buffer = BytesIO()
+        with self._rasterized(options):
+            self.figure.savefig(buffer, **savefig_args)
+        return buffer.getvalue()
+
+    def to_image(self, options: Optional[ImageOptions] = None) -> bytes:
+        """Encode the figure, stepping quality and DPI down to meet ``max_bytes``"""
+        options = options or self.resolved_options()
+        dpi = self._dpi(options)
+        data = self._encode(options, **self.savefig_args(dpi, options=options))
+        if options.max_bytes is None or len(data) <= options.max_bytes or options.format == 'svg':
+            return data
+
+        if options.format in ('webp', 'jpeg'):
+            start = options.quality or 100
+            for quality in [q for q in self.QUALITY_STEPS if q < start]:
+                data = self._encode(options, **self.savefig_args(dpi, quality, options))
+                if len(data) <= options.max_bytes:
+                    return data
+
+        quality = self.QUALITY_STEPS[-1] if options.format in ('webp', 'jpeg') else None
+        while dpi * 0.8 >= self.MIN_DPI:
+            dpi *= 0.8
+            data = self._encode(options, **self.savefig_args(dpi, quality, options))
+            if len(data) <= options.max_bytes:
+                return data
+
+        print(f"Warning: figure is {len(data)} bytes at the lowest quality, "
+              f"over its budget of {options.max_bytes} bytes")
+        return data
 
     def to_html(self) -> str:
         """Convert to HTML img tag with base64 encoded data"""
-        buffer = BytesIO()
-        self.figure.savefig(buffer, format='png', bbox_inches='tight', dpi=150)
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.read()).decode()
-        return f'<img src="data:image/png;base64,{image_base64}" style="max-width: 100%; height: auto;" />'
+        options = self.resolved_options()
+        image_base64 = base64.b64encode(self.to_image(options)).decode()
+        return f'<img src="data:{options.mime};base64,{image_base64}" style="max-width: 100%; height: auto;" />'
+
+    def close(self):
+        """Close the figure if pyplot is tracking it"""
+        pyplot = sys.modules.get('matplotlib.pyplot')
+        if pyplot is not None:
+            pyplot.close(self.figure)
+
+
+# Figure types accepted by ``add_slide``: (module, class name, converter)
+FIGURE_TYPES = [
+    ('plotly.basedatatypes', 'BaseFigure', PlotlyFigure),
+    ('matplotlib.figure', 'Figure', MatplotlibFigure),
+]
+
+
+def register_figure_type(module_name: str, class_name: str, converter: Any):
+    """
+    Teach ``add_slide`` to accept another figure type.
+
+    ``converter(figure)`` must return an object with ``to_html()``,
+    ``cache_key()`` (a string, or None to skip caching) and ``close()``. The
+    figure's module is looked up in ``sys.modules`` when a figure is added,
+    so registering a type never imports its library.
+
+    Examples
+    --------
+    >>> register_figure_type('bokeh.plotting', 'figure', BokehFigure)
+    """
+    FIGURE_TYPES.insert(0, (module_name, class_name, converter))
 
 
 @dataclass
@@ -0,0 +1,333 @@
+"""
+Live-reload development server: ``pyslides serve script.py``.
+
+The script is run as ``__main__`` whenever it (or a local module it imports,
+or a watched asset) changes. The deck it saves is captured instead of
+written, re-rendered through the fragment cache so only changed slides cost
+anything, and pushed to open browsers over Server-Sent Events.
+When only slide contents changed, the browser patches those ``<section>``s in
+place. Any other change reloads the page, and Reveal's URL hash keeps the
+current slide.
+"""
+
+######################
+# Standard libraries #
+######################
+from typing import Any, Dict, Iterable, List, Optional
+from pathlib import Path
+import http.server
+import json
+import os
+import queue
+import runpy
+import sys
+import threading
+import time
+import traceback
+
+from pyslides.cache import stable_hash
+from pyslides.pyslides import Slides, capture_saves, get_renderer
+
+
+EVENTS_PATH = '/__pyslides/events'
+
+# Injected before </body> of the served deck
+CLIENT_SCRIPT = """
+    <script>
+      // pyslides serve: apply rebuilds pushed by the server
+      (function () {
+        var build = '%(build)s';
+        var events = new EventSource('%(events)s');
+
+        events.addEventListener('build', function (event) {
+          if (event.data !== build) { window.location.reload(); }
+        });
+        events.addEventListener('reload', function () { window.location.reload(); });
+        events.addEventListener('builderror', function (event) {
+          console.error('pyslides serve: build failed\\n' + JSON.parse(event.data));
+        });
+        events.addEventListener('patch', function (event) {
+          var update = JSON.parse(event.data);
+          var sections = document.querySelectorAll('.reveal .slides > section');
+          Object.keys(update.slides).forEach(function (index) {
+            var template = document.createElement('template');
+            template.innerHTML = update.slides[index];
+            if (window.pyslidesBackgrounds) { pyslidesBackgrounds(template.content); }
+            var section = template.content.firstElementChild;
+            sections[index].parentNode.replaceChild(section, sections[index]);
+            section.querySelectorAll('script').forEach(function (inert) {
+              var script = document.createElement('script');
+              Array.prototype.forEach.call(inert.attributes, function (attr) {
+                script.setAttribute(attr.name, attr.value);
+              });
+              script.text = inert.text;
+              inert.parentNode.replaceChild(script, inert);
+            });
+          });
+          build = update.build;
+          var indices = Reveal.getIndices();
+          Reveal.sync();
+          Reveal.slide(indices.h, indices.v);
+          document.dispatchEvent(new CustomEvent('pyslides:slidesadded'));
+        });
+      })();
+    </script>
+"""
+
+
+def find_slides(namespace: Dict[str, Any], captured: List[Slides], name: Optional[str] = None) -> Slides:
+    """
+    The deck a script built: ``namespace[name]`` if given, else the last deck
+    it saved, else a global ``slides``, else its only :class:`Slides`.
+    """
+    if name is not None:
+        if not isinstance(namespace.get(name), Slides):
+            raise ValueError(f"The script defines no Slides object named '{name}'")
+        return namespace[name]
+    if captured:
+        return captured[-1]
+    if isinstance(namespace.get('slides'), Slides):
+        return namespace['slides']
+    decks = [value for value in namespace.values() if isinstance(value, Slides)]
+    if len(decks) != 1:
+        raise ValueError("Cannot tell which deck to serve: save one, or pass --name")
+    return decks[0]
+
+
+class DevServer:
+    """
+    Rebuild a deck script on change and serve the result with live reload.
+
+    Parameters
+    ----------
+    script : str
+        Python script building the deck
+    host, port : str, int, optional
+        Address to listen on. Default: 127.0.0.1:8000
+    watch : iterable of str, optional
+        Extra files or directories whose changes trigger a rebuild (data files,
+        templates, images). The script and the local modules it imports are
+        always watched.
+    name : str, optional
+        Global variable holding the deck (see :func:`find_slides`)
+    interval : float, optional
+        Polling interval of the file watcher, in seconds
+
+    Examples
+    --------
+    >>> DevServer("deck.py", port=8000).serve_forever()
+    """
+
+    def __init__(self, script: str, host: str = '127.0.0.1', port: int = 8000,
+                 watch: Iterable[str] = (), name: Optional[str] = None, interval: float = 0.2):
+        self.script = Path(script).absolute()
+        self.root = self.script.parent
+        self.host = host
+        self.port = port
+        self.watch = [Path(path).absolute() for path in watch]
+        self.name = name
+        self.interval = interval
+
+        self.html = '<!doctype html><title>pySlides</title><p>Building...</p>'
+        self.build_id = ''
+        self.sections: List[str] = []
+        self.shell = None
+        self._local_modules = set()
+        self._clients: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.httpd = None
+
+    # Building
+
+    def _forget_local_modules(self):
+        """Drop modules imported from the script's directory so edits to them apply"""
+        for name in self._local_modules:
+            sys.modules.pop(name, None)
+        self._local_modules = set()
+
+    def _record_local_modules(self, preloaded: set):
+        """Remember the modules the script loaded from its own directory tree"""
+        for name in set(sys.modules) - preloaded:
+            path = getattr(sys.modules[name], '__file__', None)
+            if path and self.root in Path(path).absolute().parents and 'site-packages' not in path:
+                self._local_modules.add(name)
+
+    def run_script(self) -> Slides:
+        """Execute the script as ``__main__`` and return its deck"""
+        self._forget_local_modules()
+        preloaded = set(sys.modules)
+        argv, sys.argv = sys.argv, [str(self.script)]
+        sys.path.insert(0, str(self.root))
+        try:
+            with capture_saves() as captured:
+                namespace = runpy.run_path(str(self.script), run_name='__main__')
+        finally:
+            sys.argv = argv
+            sys.path.remove(str(self.root))
+            self._record_local_modules(preloaded)
+        return find_slides(namespace, captured, self.name)
+
+    def render(self, slides: Slides) -> Dict[str, Any]:
+        """Render a deck to its per-slide sections and the full document"""
+        if slides.fragment_cache is False:
+            slides.fragment_cache = True
+        slides.convert_figures()
+        renderer = slides.renderer or get_renderer()
+        backgrounds = slides._backgrounds(base_dir=self.root)
+        sections = list(slides._render_sections(renderer, backgrounds[0]))
+        # Backgrounds are part of the shell: changing one reloads the page
+        shell = stable_hash(renderer.render('base.html', **slides._template_context([], None, backgrounds)))
+        build = stable_hash(shell, *sections)[:16]
+        html = renderer.render('base.html', **slides._template_context(sections, None, backgrounds))
+        client = CLIENT_SCRIPT % dict(build=build, events=EVENTS_PATH)
+        head, _, tail = html.rpartition('</body>')
+        html = head + client + '</body>' + tail if head else html + client
+        return dict(sections=sections, shell=shell, build=build, html=html)
+
+    def build(self) -> bool:
+        """Rebuild and notify browsers; on failure keep serving the last good deck"""
+        start = time.perf_counter()
+        try:
+            document = self.render(self.run_script())
+        except Exception:
+            error = traceback.format_exc()
+            print(f"✗ Build failed:\n{error}", file=sys.stderr)
+            self.broadcast('builderror', json.dumps(error))
+            return False
+
+        with self._lock:
+            previous, self.sections = self.sections, document['sections']
+            same_shell = self.shell == document['shell'] and len(previous) == len(self.sections)
+            self.shell, self.build_id, self.html = document['shell'], document['build'], document['html']
+
+        if same_shell:
+            changed = {index: html for index, (old, html) in enumerate(zip(previous, self.sections))
+                       if old != html}
+            if changed:
+                self.broadcast('patch', json.dumps(dict(build=self.build_id, slides=changed)))
+            summary = f"{len(changed)} slide(s) changed"
+        else:
+            self.broadcast('reload', self.build_id)
+            summary = f"{len(self.sections)} slide(s)"
+        print(f"✓ Rebuilt in {time.perf_counter() - start:.2f}s ({summary})")
+        return True
+
+    # Watching
+
+    def watched_files(self) -> Dict[Path, float]:
+        """Modification times of everything that triggers a rebuild"""
+        paths = {self.script}
+        for name in self._local_modules:
+            path = getattr(sys.modules.get(name), '__file__', None)
+            if path:
+                paths.add(Path(path))
+        for path in self.watch:
+            if path.is_dir():
+                paths.update(child for child in path.rglob('*') if child.is_file())
+            else:
+                paths.add(path)
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = path.stat().st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def _watch(self):
+        seen = self.watched_files()
+        while not self._stop.wait(self.interval):
+            current = self.watched_files()
+            if current != seen:
+                self.build()
+                seen = self.watched_files()
+
+    # Serving
+
+    def broadcast(self, event: str, data: str):
+        """Send a Server-Sent Event to every connected browser"""
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            client.put((event, data))
+
+    def _handler(self):
+        server = self
+
+        class Handler(http.server.SimpleHTTPRequestHandler):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, directory=str(server.root), **kwargs)
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path in ('/', '/index.html'):
+                    with server._lock:
+                        body = server.html.encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.send_header('Cache-Control', 'no-store')
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif path == EVENTS_PATH:
+                    self._events()
+                else:
+                    super().do_GET()
+
+            def _events(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                client = queue.Queue()
+                client.put(('build', server.build_id))
+                with server._lock:
+                    server._clients.append(client)
+                try:
+                    while not server._stop.is_set():
+                        try:
+                            event, data = client.get(timeout=15)
+                            message = f"event: {event}\ndata: {data}\n\n"
+                        except queue.Empty:
+                            message = ": keep-alive\n\n"
+                        self.wfile.write(message.encode('utf-8'))
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with server._lock:
+                        server._clients.remove(client)
+
+        return Handler
+
+    def start(self):
+        """Build once, then watch and serve on background threads"""
+        os.environ.setdefault('MPLBACKEND', 'Agg')
+        self.build()
+        self.httpd = http.server.ThreadingHTTPServer((self.host, self.port), self._handler())
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self._watch, daemon=True).start()
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        print(f"✓ Serving {self.script.name} at http://{self.host}:{self.port}/ (Ctrl+C to stop)")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while not self._stop.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
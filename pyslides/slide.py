@@ -0,0 +1,194 @@
+"""
+Slide model.
+
+Every slide is an instance of :class:`Slide` or of the subtype for its
+layout. Slots keep large decks small in memory, and each layout only accepts
+the fields its template shows, so a misspelt or misplaced field fails in
+``add_slide`` instead of rendering an empty slide. Slides still behave like
+the dicts they replace (``slide['title']``, ``slide.get('notes')``,
+``'figure' in slide``, ``dict(slide)``, ``setdefault``, ``update``, ``pop``).
+A field set to None counts as missing, and keys outside the layout's fields
+raise TypeError rather than being added.
+"""
+
+######################
+# Standard libraries #
+######################
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+_MISSING = object()
+
+# Fields every layout accepts
+COMMON_FIELDS = ('title', 'notes', 'background', 'background_color', 'transition', 'vertical', 'extra')
+
+
+class Slide:
+    """
+    A slide with the default layout: title, subtitle, content and a figure.
+
+    Parameters
+    ----------
+    **fields
+        Any of :attr:`fields`. Fields left out are None.
+
+    Raises
+    ------
+    TypeError
+        If a field is not shown by this layout.
+
+    Examples
+    --------
+    >>> slide = Slide(title="Results", content="<p>Up 12%</p>")
+    >>> slide.title, slide['content'], slide.get('figure')
+    ('Results', '<p>Up 12%</p>', None)
+    """
+
+    layout = 'default'
+    fields: Tuple[str, ...] = COMMON_FIELDS + ('subtitle', 'content', 'figure', 'head_style')
+
+    __slots__ = COMMON_FIELDS + ('subtitle', 'content', 'figure', 'head_style')
+
+    def __init__(self, **fields):
+        assign = object.__setattr__
+        for name in self.fields:
+            assign(self, name, fields.pop(name, None))
+        unknown = [name for name, value in fields.items() if value is not None]
+        if unknown:
+            raise TypeError(f"The '{self.layout}' layout does not take {unknown}. "
+                            f"Fields: {list(self.fields)} (use extra={{...}} for custom templates)")
+
+    def __setattr__(self, name: str, value: Any):
+        if name not in self.fields:
+            raise TypeError(f"The '{self.layout}' layout does not take '{name}'. Fields: {list(self.fields)}")
+        object.__setattr__(self, name, value)
+
+    # Dict-style access
+
+    def keys(self) -> Iterator[str]:
+        """Names of the fields that are set, plus 'layout'"""
+        yield 'layout'
+        for name in self.fields:
+            if getattr(self, name) is not None:
+                yield name
+
+    __iter__ = keys
+
+    def values(self) -> Iterator[Any]:
+        return (self[name] for name in self.keys())
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return ((name, self[name]) for name in self.keys())
+
+    def __getitem__(self, name: str) -> Any:
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __setitem__(self, name: str, value: Any):
+        setattr(self, name, value)
+
+    def __delitem__(self, name: str):
+        self.pop(name)
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.keys())
+
+    def get(self, name: str, default: Any = None) -> Any:
+        if name in self.fields or name == 'layout':
+            value = getattr(self, name)
+            if value is not None:
+                return value
+        return default
+
+    def setdefault(self, name: str, default: Any = None) -> Any:
+        value = self.get(name)
+        if value is None and default is not None:
+            setattr(self, name, default)
+            return default
+        return value
+
+    def update(self, other: Any = (), **fields):
+        """Set fields from a mapping or ``(name, value)`` pairs; a matching 'layout' key is ignored"""
+        pairs = other.items() if hasattr(other, 'items') else other
+        for name, value in list(pairs) + list(fields.items()):
+            if name == 'layout' and value == self.layout:
+                continue
+            setattr(self, name, value)
+
+    def pop(self, name: str, default: Any = _MISSING) -> Any:
+        """Unset a field (set it to None) and return its value"""
+        value = self.get(name)
+        if value is None:
+            if default is _MISSING:
+                raise KeyError(name)
+            return default
+        setattr(self, name, None)
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def copy(self) -> 'Slide':
+        return type(self)(**{name: value for name, value in self.items() if name != 'layout'})
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Slide):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={value!r}' for name, value in self.items() if name != 'layout')
+        return f"{type(self).__name__}({fields})"
+
+
+class TitleSlide(Slide):
+    """Title slide: title, subtitle, author and optional content below them"""
+    layout = 'title'
+    fields = COMMON_FIELDS + ('subtitle', 'author', 'content')
+    __slots__ = ('author',)
+
+
+class TwoColumnSlide(Slide):
+    """Two columns, each with content and/or a figure"""
+    layout = 'two-column'
+    fields = COMMON_FIELDS + ('content_left', 'content_right', 'figure_left', 'figure_right')
+    __slots__ = ('content_left', 'content_right', 'figure_left', 'figure_right')
+
+
+class ImageRightSlide(Slide):
+    """Text (title, subtitle, content) on the left two thirds, figure on the right third"""
+    layout = 'image-right'
+    fields = COMMON_FIELDS + ('subtitle', 'content', 'figure')
+    __slots__ = ()
+
+
+class ImageLeftSlide(Slide):
+    """Figure on the left third, text (title, subtitle, content) on the right"""
+    layout = 'image-left'
+    fields = COMMON_FIELDS + ('subtitle', 'content', 'figure')
+    __slots__ = ()
+
+
+SLIDE_TYPES = {cls.layout: cls for cls in (Slide, TitleSlide, TwoColumnSlide, ImageLeftSlide, ImageRightSlide)}
+
+
+def make_slide(layout: Optional[str] = 'default', **fields) -> Slide:
+    """
+    Create the slide type for ``layout``.
+
+    Raises
+    ------
+    ValueError
+        If the layout is unknown.
+    TypeError
+        If a field is not shown by the layout.
+    """
+    cls = SLIDE_TYPES.get(layout or 'default')
+    if cls is None:
+        raise ValueError(f"Unknown layout '{layout}'. Options: {list(SLIDE_TYPES)}")
+    return cls(**fields)
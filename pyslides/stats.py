@@ -0,0 +1,240 @@
+"""
+Deck size analysis and size budgets.
+
+:func:`analyze` breaks a deck's content down by slide, by slide field and by
+kind of payload (base64 images, Plotly JSON, other scripts, CSS, HTML). It
+reads the converted field values with a few linear scans, without
+rendering, so it is cheap enough to run on every build. :class:`SizeBudget`
+turns the numbers into warnings or errors in ``save``.
+"""
+
+######################
+# Standard libraries #
+######################
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pyslides.assets import DATA_URI
+
+
+# Payload kinds, in the order reports list them
+TYPES = ('image', 'plotly', 'script', 'css', 'html', 'text')
+
+# Closing character of a data URI, by the character that opens it
+URI_END = {'"': '"', "'": "'", '(': ')'}
+
+
+def _nbytes(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode('utf-8'))
+
+
+def _blocks(text: str, start_tag: str, end_tag: str) -> Iterator[Tuple[int, int]]:
+    """Spans of ``start_tag ... end_tag`` blocks (plain ``str.find``: figures run to many MB)"""
+    start = text.find(start_tag)
+    while start != -1:
+        end = text.find(end_tag, start)
+        if end == -1:
+            return
+        end += len(end_tag)
+        yield start, end
+        start = text.find(start_tag, end)
+
+
+def _image_bytes(text: str) -> int:
+    """Bytes of base64 image data URIs in ``text``"""
+    size = 0
+    start = text.find('data:image/')
+    while start != -1:
+        closing = URI_END.get(text[start - 1]) if start else None
+        end = text.find(closing, start) if closing else -1
+        if end == -1:
+            match = DATA_URI.match(text, start)
+            end = match.end() if match else start + 11
+        if text.find(';base64,', start, end) != -1:
+            size += end - start
+        start = text.find('data:image/', end)
+    return size
+
+
+def classify(text: str, markup: bool = True) -> Dict[str, int]:
+    """
+    Bytes of ``text`` per payload kind.
+
+    Base64 images, ``<script>`` blocks (Plotly ones counted as 'plotly') and
+    ``<style>`` blocks are measured; the rest is 'html', or 'text' when
+    ``markup`` is False (titles, notes).
+    """
+    total = _nbytes(text)
+    if not markup:
+        return {'text': total}
+    sizes = {}
+    if 'base64,' in text:
+        sizes['image'] = _image_bytes(text)
+    for start, end in _blocks(text, '<script', '</script>'):
+        kind = 'plotly' if text.find('Plotly.', start, end) != -1 else 'script'
+        sizes[kind] = sizes.get(kind, 0) + end - start
+    for start, end in _blocks(text, '<style', '</style>'):
+        sizes['css'] = sizes.get('css', 0) + end - start
+    sizes = {kind: size for kind, size in sizes.items() if size}
+    sizes['html'] = max(0, total - sum(sizes.values()))
+    return sizes
+
+
+@dataclass
+class SlideStats:
+    """Content bytes of one slide, per field, per payload kind and per figure"""
+    index: int
+    title: Optional[str]
+    bytes: int = 0
+    fields: Dict[str, int] = field(default_factory=dict)
+    types: Dict[str, int] = field(default_factory=dict)
+    figures: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class DeckStats:
+    """
+    Size breakdown of a deck, as returned by :meth:`Slides.stats`.
+
+    Sizes are those of the slide contents as stored in the deck, before
+    ``compress_payloads`` packing or sidecar extraction, and without the
+    document shell (template and runtime).
+    """
+    slides: List[SlideStats]
+    custom_css: int = 0
+
+    @property
+    def total(self) -> int:
+        return sum(slide.bytes for slide in self.slides) + self.custom_css
+
+    @property
+    def by_type(self) -> Dict[str, int]:
+        totals = dict.fromkeys(TYPES, 0)
+        totals['css'] += self.custom_css
+        for slide in self.slides:
+            for kind, size in slide.types.items():
+                totals[kind] += size
+        return {kind: size for kind, size in totals.items() if size}
+
+    @property
+    def by_field(self) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        for slide in self.slides:
+            for name, size in slide.fields.items():
+                totals[name] = totals.get(name, 0) + size
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def largest(self, count: int = 10) -> List[SlideStats]:
+        return sorted(self.slides, key=lambda slide: slide.bytes, reverse=True)[:count]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(total=self.total, by_type=self.by_type, by_field=self.by_field,
+                    custom_css=self.custom_css, slides=[asdict(slide) for slide in self.slides])
+
+    def summary(self, top: int = 10) -> str:
+        """Totals by payload kind and field, and the largest slides, as text"""
+        total = self.total or 1
+        lines = [f"Content: {self.total:,} B in {len(self.slides)} slide(s)", "By type:"]
+        lines += [f"  {kind:<10} {size:>14,} B {size / total:6.1%}" for kind, size in self.by_type.items()]
+        lines.append("By field:")
+        lines += [f"  {name:<16} {size:>14,} B" for name, size in self.by_field.items()]
+        lines.append("Largest slides:")
+        for slide in self.largest(top):
+            kind = max(slide.types, key=slide.types.get) if slide.types else '-'
+            lines.append(f"  #{slide.index:<5} {str(slide.title)[:36]:<36} {slide.bytes:>14,} B  mostly {kind}")
+        return '\n'.join(lines)
+
+
+# Fields holding plain text rather than markup
+TEXT_FIELDS = ('title', 'subtitle', 'author', 'notes', 'background', 'background_color', 'transition')
+
+
+def analyze(slides: Iterable[Any], figure_fields: Iterable[str], custom_css: Optional[str] = None) -> DeckStats:
+    """Size breakdown of converted slides (see :class:`DeckStats`)"""
+    figure_fields = tuple(figure_fields)
+    result = []
+    for index, slide in enumerate(slides):
+        stats = SlideStats(index, slide.get('title'))
+        for name, value in slide.items():
+            if name == 'layout' or isinstance(value, bool):
+                continue
+            text = value if isinstance(value, str) else str(value)
+            sizes = classify(text, markup=name not in TEXT_FIELDS)
+            size = sum(sizes.values())
+            stats.fields[name] = size
+            stats.bytes += size
+            for kind, kind_size in sizes.items():
+                stats.types[kind] = stats.types.get(kind, 0) + kind_size
+            if name in figure_fields:
+                stats.figures[name] = size
+        result.append(stats)
+    return DeckStats(result, _nbytes(custom_css) if custom_css else 0)
+
+
+class BudgetExceededError(ValueError):
+    """Raised by ``save`` when a deck breaks a :class:`SizeBudget` with ``action='error'``"""
+
+    def __init__(self, violations: List[str]):
+        self.violations = violations
+        super().__init__("Deck exceeds its size budget:\n  " + "\n  ".join(violations))
+
+
+@dataclass
+class SizeBudget:
+    """
+    Size limits checked by ``save``.
+
+    Parameters
+    ----------
+    max_total : int, optional
+        Bytes of the saved HTML document
+    max_slide : int, optional
+        Content bytes of any one slide
+    max_figure : int, optional
+        Bytes of any one converted figure
+    action : {'warn', 'error'}, optional
+        Print a warning per violation, or raise :class:`BudgetExceededError`
+        (the previous file at the output path is then left untouched).
+        Default: 'warn'
+
+    Examples
+    --------
+    >>> slides.save("deck.html", budget=SizeBudget(max_total=20_000_000, max_figure=2_000_000,
+    ...                                            action='error'))
+    """
+    max_total: Optional[int] = None
+    max_slide: Optional[int] = None
+    max_figure: Optional[int] = None
+    action: str = 'warn'
+
+    def __post_init__(self):
+        if self.action not in ('warn', 'error'):
+            raise ValueError(f"Unknown budget action '{self.action}'. Options: 'warn', 'error'")
+
+    def content_violations(self, stats: DeckStats) -> List[str]:
+        """Slides and figures over their limits"""
+        violations = []
+        for slide in stats.slides:
+            label = f"Slide {slide.index} ({slide.title!r})"
+            if self.max_slide is not None and slide.bytes > self.max_slide:
+                kind = max(slide.types, key=slide.types.get)
+                violations.append(f"{label} is {slide.bytes:,} B, over the {self.max_slide:,} B slide "
+                                  f"budget (mostly {kind})")
+            if self.max_figure is not None:
+                violations += [f"{label} {name} is {size:,} B, over the {self.max_figure:,} B figure budget"
+                               for name, size in slide.figures.items() if size > self.max_figure]
+        return violations
+
+    def total_violations(self, total: int) -> List[str]:
+        if self.max_total is not None and total > self.max_total:
+            return [f"The deck is {total:,} B, over the {self.max_total:,} B total budget"]
+        return []
+
+    def enforce(self, violations: List[str]):
+        """Warn about or raise for ``violations``"""
+        if not violations:
+            return
+        if self.action == 'error':
+            raise BudgetExceededError(violations)
+        for violation in violations:
+            print(f"Warning: {violation}")
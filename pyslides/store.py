@@ -0,0 +1,136 @@
+"""
+On-disk deck format for saving, loading and merging decks without rerunning
+the scripts that built them.
+
+A deck directory holds ``manifest.json`` (header, theme, config, chapters
+and slides) and ``blobs/<sha256>`` with the converted HTML of every figure,
+each stored once. Loaded figures stay on disk as :class:`BlobFigure` handles
+that are memory-mapped only when the deck is rendered.
+"""
+
+######################
+# Standard libraries #
+######################
+from typing import Any, Dict
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import uuid
+
+
+FORMAT = 'pyslides-deck'
+FORMAT_VERSION = 1
+BLOB_KEY = '$blob'
+
+
+class BlobFigure:
+    """
+    Converted figure HTML stored in a deck directory's blob store.
+
+    The HTML is decoded from a memory map of the blob each time it is
+    rendered and never kept in memory; ``digest()`` is the blob hash, so
+    cached fragments of the slide are found without reading the blob at all.
+    """
+
+    __slots__ = ('path', 'sha')
+
+    converted = True
+
+    def __init__(self, path: str, sha: str):
+        self.path = Path(path)
+        self.sha = sha
+
+    def digest(self) -> str:
+        return self.sha
+
+    def __str__(self) -> str:
+        # Decoded straight from a read-only map of the file: the only copy
+        # made is the str itself
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ''
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return str(mapped, 'utf-8')
+
+    __html__ = __str__
+
+    def __repr__(self) -> str:
+        return f"BlobFigure({self.sha[:12]})"
+
+
+def _write_blob(blobs: Path, value: Any) -> str:
+    """Store a figure's HTML under its hash (once) and return the hash"""
+    if isinstance(value, BlobFigure):
+        sha, data = value.sha, None
+    else:
+        data = str(value).encode('utf-8')
+        sha = hashlib.sha256(data).hexdigest()
+    target = blobs / sha
+    if not target.exists():
+        partial = target.with_name(f'{sha}.{uuid.uuid4().hex}.part')
+        if data is None:
+            shutil.copyfile(value.path, partial)
+        else:
+            partial.write_bytes(data)
+        os.replace(partial, target)
+    return sha
+
+
+def _encode_value(key: str, value: Any, blobs: Path, figure_fields) -> Any:
+    if key in figure_fields:
+        return {BLOB_KEY: _write_blob(blobs, value)}
+    if value is None or isinstance(value, (str, int, float, bool, list, dict)):
+        return value
+    if hasattr(value, '__html__'):
+        return str(value)
+    raise ValueError(f"Slide field '{key}' of type {type(value).__name__} cannot be serialised")
+
+
+def dump_deck(slides: Any, directory: str, figure_fields) -> Path:
+    """Write ``slides`` (figures converted) to a deck directory"""
+    directory = Path(directory)
+    blobs = directory / 'blobs'
+    blobs.mkdir(parents=True, exist_ok=True)
+
+    manifest = dict(
+        format=FORMAT,
+        version=FORMAT_VERSION,
+        header=slides.header,
+        theme=slides.theme,
+        custom_css=slides.custom_css,
+        config=slides.config,
+        lazy_load=slides.lazy_load,
+        compress_payloads=slides.compress_payloads,
+        optimize_backgrounds=(asdict(slides.optimize_backgrounds) if is_dataclass(slides.optimize_backgrounds)
+                              else bool(slides.optimize_backgrounds)),
+        chapters=slides.chapters,
+        slides=[{key: _encode_value(key, value, blobs, figure_fields) for key, value in slide.items()}
+                for slide in slides.slides],
+    )
+    partial = directory / f'manifest.json.{uuid.uuid4().hex}.part'
+    partial.write_text(json.dumps(manifest, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+    os.replace(partial, directory / 'manifest.json')
+    return directory
+
+
+def read_manifest(directory: str) -> Dict[str, Any]:
+    """Load and check a deck directory's manifest, with figures as :class:`BlobFigure`"""
+    directory = Path(directory)
+    manifest = json.loads((directory / 'manifest.json').read_text(encoding='utf-8'))
+    if manifest.get('format') != FORMAT:
+        raise ValueError(f"{directory} is not a pySlides deck directory")
+    if manifest.get('version', 0) > FORMAT_VERSION:
+        raise ValueError(f"{directory} was written by a newer pySlides (format version "
+                         f"{manifest['version']}, this version reads {FORMAT_VERSION})")
+
+    blobs = directory / 'blobs'
+    for slide in manifest['slides']:
+        for key, value in slide.items():
+            if isinstance(value, dict) and set(value) == {BLOB_KEY}:
+                slide[key] = BlobFigure(blobs / value[BLOB_KEY], value[BLOB_KEY])
+    return manifest
+
@@ -0,0 +1,249 @@
+"""
+Build instrumentation.
+
+Inside ``with trace_build() as trace:`` every ``save`` and ``export_pdf``
+records timed spans for its phases (figure conversion per slide, template
+rendering per slide, writing, PDF printing) and the bytes each slide, asset
+file and output file contributes. The trace can be summarised as text or
+exported as JSON and as a Chrome trace (``chrome://tracing``, Perfetto).
+Nothing is recorded, and nothing costs anything, outside the block.
+"""
+
+######################
+# Standard libraries #
+######################
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+import json
+import os
+import threading
+import time
+
+
+TRACE_FORMAT = 'pyslides-trace'
+
+
+@dataclass
+class Span:
+    """A timed section of a build; ``start`` is in seconds since the trace began"""
+    name: str
+    category: str
+    start: float
+    duration: float
+    thread: int
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+class BuildTrace:
+    """
+    Timings and sizes recorded while building decks.
+
+    Parameters
+    ----------
+    on_span : callable, optional
+        Called with each :class:`Span` as it finishes, e.g. to forward spans to
+        a metrics system while the build runs
+
+    Attributes
+    ----------
+    spans : list of Span
+        Every recorded span, in the order they finished
+    slides : dict
+        Per-slide records, keyed by ``(deck, index)`` so several decks can be
+        traced together (deck, index, title, bytes, render/convert seconds).
+        ``deck`` is the output being built (see :meth:`deck`).
+    assets : dict
+        Sidecar and chapter files written (name → bytes)
+    outputs : dict
+        Deck files written, including precompressed copies (path → bytes)
+
+    Examples
+    --------
+    >>> with trace_build() as trace:
+    ...     slides.save("deck.html")
+    >>> print(trace.summary())
+    >>> trace.save_chrome("deck.trace.json")
+    """
+
+    def __init__(self, on_span: Optional[Callable[[Span], Any]] = None):
+        self.on_span = on_span
+        self.spans: List[Span] = []
+        self.slides: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self.assets: Dict[str, int] = {}
+        self.outputs: Dict[str, int] = {}
+        self._clock = time.perf_counter()
+        self._wall = time.time()
+        self._local = threading.local()
+
+    def now(self) -> float:
+        """Seconds since the trace began"""
+        return time.perf_counter() - self._clock
+
+    def from_wall(self, wall: float) -> float:
+        """Trace time of a ``time.time()`` timestamp taken in another process"""
+        return wall - self._wall
+
+    def add_span(self, name: str, start: float, duration: float, category: str = 'build',
+                 thread: Optional[int] = None, **args) -> Span:
+        span = Span(name, category, start, duration,
+                    threading.get_ident() if thread is None else thread, args)
+        self.spans.append(span)
+        if self.on_span is not None:
+            self.on_span(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, category: str = 'build', **args):
+        """Time the body of the ``with`` block; yields the span's args for late additions"""
+        start = self.now()
+        try:
+            yield args
+        finally:
+            self.add_span(name, start, self.now() - start, category, **args)
+
+    @property
+    def current_deck(self) -> Optional[str]:
+        """Label of the deck the calling thread is building, if any"""
+        return getattr(self._local, 'deck', None)
+
+    @contextmanager
+    def deck(self, label: str):
+        """Attribute the slide records made by this thread inside the block to deck ``label``"""
+        previous, self._local.deck = self.current_deck, label
+        try:
+            yield
+        finally:
+            self._local.deck = previous
+
+    def slide(self, index: int) -> Dict[str, Any]:
+        """The record of slide ``index`` of the current deck, created on first use"""
+        deck = self.current_deck or ''
+        record = self.slides.get((deck, index))
+        if record is None:
+            record = self.slides[deck, index] = dict(deck=deck, index=index, title=None, bytes=0,
+                                                     render_seconds=0.0, convert_seconds=0.0)
+        return record
+
+    def count_slides(self, sections):
+        """Pass rendered sections through, recording the bytes each one adds to the output"""
+        deck = self.current_deck
+        for index, html in enumerate(sections):
+            with self.deck(deck):
+                self.slide(index)['bytes'] = len(html.encode('utf-8'))
+            yield html
+
+    def phases(self) -> Dict[str, float]:
+        """Total seconds per phase span"""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            if span.category == 'phase':
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration
+        return totals
+
+    # Export
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            format=TRACE_FORMAT,
+            version=1,
+            phases=self.phases(),
+            slides=[self.slides[key] for key in sorted(self.slides)],
+            assets=self.assets,
+            outputs=self.outputs,
+            spans=[asdict(span) for span in self.spans],
+        )
+
+    def save(self, path: str):
+        """Write the trace as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=1, default=str)
+
+    def to_chrome(self) -> Dict[str, Any]:
+        """The spans in Chrome's Trace Event Format (complete events, microseconds)"""
+        pid = os.getpid()
+        events = [dict(name=span.name, cat=span.category, ph='X', pid=pid, tid=span.thread,
+                       ts=round(span.start * 1e6, 3), dur=round(span.duration * 1e6, 3),
+                       args=span.args)
+                  for span in self.spans]
+        events.append(dict(name='process_name', ph='M', pid=pid, tid=0, args=dict(name='pyslides build')))
+        return dict(traceEvents=events, displayTimeUnit='ms')
+
+    def save_chrome(self, path: str):
+        """Write a Chrome trace, to open in ``chrome://tracing`` or https://ui.perfetto.dev"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome(), f, default=str)
+
+    def summary(self, top: int = 10) -> str:
+        """Phase timings, the largest and slowest slides, and file sizes as text"""
+        lines = ['Phases:']
+        lines += [f"  {name:<24} {seconds:8.3f}s" for name, seconds in self.phases().items()]
+        slides = list(self.slides.values())
+        several = len({record['deck'] for record in slides}) > 1
+        for label, key, unit in (('Largest slides', 'bytes', 'B'),
+                                 ('Slowest slides', None, 's')):
+            def cost(record):
+                return record['bytes'] if key else record['render_seconds'] + record['convert_seconds']
+            ranked = sorted(slides, key=cost, reverse=True)[:top]
+            if ranked and cost(ranked[0]):
+                lines.append(f"{label}:")
+                lines += [f"  {record['deck'] + ' ' if several else ''}#{record['index']:<5} "
+                          f"{str(record['title'])[:40]:<40} "
+                          + (f"{record['bytes']:>10,} B" if key else
+                             f"render {record['render_seconds']:.3f}s  convert {record['convert_seconds']:.3f}s")
+                          for record in ranked]
+        if self.assets:
+            lines.append(f"Assets: {len(self.assets)} file(s), {sum(self.assets.values()):,} B")
+        lines += [f"Output: {path} {size:,} B" for path, size in self.outputs.items()]
+        return '\n'.join(lines)
+
+
+_active_trace: Optional[BuildTrace] = None
+
+
+def current_trace() -> Optional[BuildTrace]:
+    """The trace being recorded, or None outside :func:`trace_build`"""
+    return _active_trace
+
+
+@contextmanager
+def trace_build(trace: Optional[BuildTrace] = None, on_span: Optional[Callable[[Span], Any]] = None):
+    """
+    Record every deck build inside the block into a :class:`BuildTrace`.
+
+    Examples
+    --------
+    >>> with trace_build() as trace:
+    ...     slides.save("deck.html")
+    >>> trace.save("deck.trace.json")
+    """
+    global _active_trace
+    if trace is None:
+        trace = BuildTrace(on_span=on_span)
+    previous, _active_trace = _active_trace, trace
+    try:
+        yield trace
+    finally:
+        _active_trace = previous
+
+
+@contextmanager
+def traced_deck(label: str):
+    """Attribute slide records to deck ``label`` in the active trace, unless a caller already named the deck"""
+    trace = _active_trace
+    if trace is None or trace.current_deck is not None:
+        yield
+    else:
+        with trace.deck(label):
+            yield
+
+
+@contextmanager
+def phase(name: str, **args):
+    """Time a build phase into the active trace, if any"""
+    trace = _active_trace
+    if trace is None:
+        yield args
+    else:
+        with trace.span(name, 'phase', **args) as span_args:
+            yield span_args
@@ -50,5 +50,6 @@ setup(name='pyslides',
       python_requires='>=3.6',
       install_requires=install_reqs,
       extras_require=extras_require,
+      entry_points={'console_scripts': ['pyslides=pyslides.cli:main']},
       include_package_data=True,
-      package_data={'': ['data/base.html']})
+      package_data={'': ['data/base.html', 'data/slide.html']})
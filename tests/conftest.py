@@ -0,0 +1,105 @@
+import asyncio
+import io
+import re
+from types import SimpleNamespace
+from urllib.parse import urljoin
+
+import pytest
+
+from .context import pyslides
+from pyslides.export import READY_EXPRESSION, BrowserBackend
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Keep the shared on-disk caches out of the user's home directory"""
+    monkeypatch.setenv('PYSLIDES_CACHE_DIR', str(tmp_path / 'cache'))
+    pyslides.set_figure_cache(None)
+    pyslides.set_fragment_cache(None)
+    pyslides.set_background_cache(None)
+    yield
+    pyslides.set_figure_cache(None)
+    pyslides.set_fragment_cache(None)
+    pyslides.set_background_cache(None)
+
+
+class FakePage:
+    """Playwright page stand-in: serves routed requests and records what the exporters do"""
+
+    def __init__(self, backend):
+        self.backend, self.html, self.handler, self.size, self.current = backend, None, None, None, None
+
+    async def set_viewport_size(self, size):
+        self.size = size
+
+    async def route(self, url, handler):
+        self.handler = handler
+
+    async def unroute(self, url):
+        self.handler = None
+
+    async def fetch(self, url):
+        response = SimpleNamespace(request=SimpleNamespace(url=url))
+
+        async def fulfill(status, body=None, path=None, content_type=None):
+            response.status, response.body = status, body if path is None else open(path, 'rb').read()
+        response.fulfill = fulfill
+        await self.handler(response)
+        return response
+
+    async def goto(self, url, wait_until, timeout):
+        self.html = (await self.fetch(url)).body
+        self.backend.documents.append(self.html)
+        for src in re.findall(r'<img src="([^"]+)"', self.html):
+            self.backend.loaded[src] = (await self.fetch(urljoin(url, src))).status
+
+    async def wait_for_function(self, expression, timeout):
+        assert expression == READY_EXPRESSION and 'window.__pyslidesReady = true' in self.html
+
+    async def evaluate(self, expression, index):
+        assert 'pyslidesSettle' in expression
+        self.current = index
+
+    async def screenshot(self, type):
+        from PIL import Image
+
+        self.backend.captured.append(self.current)
+        buffer = io.BytesIO()
+        Image.new('RGB', (self.size['width'], self.size['height']), 'white').save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    async def pdf(self, **options):
+        self.backend.active += 1
+        self.backend.peak = max(self.backend.peak, self.backend.active)
+        await asyncio.sleep(0.01)
+        self.backend.active -= 1
+        if 'Broken' in self.html:
+            raise RuntimeError('print failed')
+        return b'%PDF-' + self.html.split('<h2 >')[1].split('<')[0].encode()
+
+    async def close(self):
+        self.backend.closed += 1
+
+
+class FakeBackend(BrowserBackend):
+    """Browser backend handing out :class:`FakePage` pages and counting their use"""
+
+    def __init__(self):
+        self.starts = self.pages = self.closed = self.active = self.peak = 0
+        self.documents, self.loaded, self.captured = [], {}, []
+
+    async def start(self):
+        self.starts += 1
+
+    async def new_page(self):
+        self.pages += 1
+        return FakePage(self)
+
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def fake_browser():
+    """Factory for fake browser backends, so exports run without playwright"""
+    return FakeBackend
@@ -0,0 +1,33 @@
+#########################
+# Load the main package #
+#########################
+from .context import pyslides
+
+##################
+# Testing module #
+##################
+import os
+import subprocess
+import sys
+
+# Generous ceiling for `import pyslides` in a fresh interpreter. Importing
+# plotly or matplotlib up front costs close to a second on its own.
+IMPORT_BUDGET_SECONDS = 0.5
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import pyslides
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in ('plotly', 'matplotlib', 'numpy', 'jinja2') if name in sys.modules)
+print(elapsed, ','.join(heavy))
+"""
+
+
+def test_import_is_fast_and_does_not_load_figure_libraries():
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=root, check=True,
+                            capture_output=True, text=True).stdout.split()
+    elapsed, heavy = float(output[0]), output[1:]
+    assert heavy == []
+    assert elapsed < IMPORT_BUDGET_SECONDS
@@ -6,6 +6,8 @@ from .context import pyslides
 ##################
 # Testing module #
 ##################
+import json
+
 import pytest
 
 @pytest.mark.parametrize("attr", [('add'), ('save')])
@@ -13,3 +15,687 @@ def test_slides_has_needed_attrs(attr):
     assert hasattr(pyslides.Slides, attr)
 
     
+def test_renderer_is_shared_and_compiles_once():
+    renderer = pyslides.get_renderer()
+    assert renderer is pyslides.get_renderer()
+    assert renderer.get_template() is renderer.get_template()
+
+
+def test_renderer_template_override_and_invalidate(tmp_path):
+    (tmp_path / 'base.html').write_text('v1 {{ header.title }}')
+    renderer = pyslides.Renderer(template_dirs=[str(tmp_path)],
+                                 bytecode_cache_dir=str(tmp_path / 'bytecode'))
+    slides = pyslides.Slides(title="Deck", renderer=renderer)
+    output = tmp_path / 'deck.html'
+    slides.save(str(output))
+    assert output.read_text() == 'v1 Deck'
+
+    (tmp_path / 'base.html').write_text('v2 {{ header.title }}')
+    slides.save(str(output))
+    assert output.read_text() == 'v1 Deck'
+    renderer.invalidate()
+    slides.save(str(output))
+    assert output.read_text() == 'v2 Deck'
+
+
+def test_save_streams_to_paths_and_file_objects(tmp_path):
+    import io
+    slides = pyslides.Slides(title="Stream")
+    for i in range(50):
+        slides.add_slide(title=f"Slide {i}", content="<p>x</p>" * 100)
+    path = tmp_path / 'deck.html'
+    slides.save(path, buffer_size=256)
+    expected = path.read_bytes()
+
+    binary, text = io.BytesIO(), io.StringIO()
+    slides.save(binary, buffer_size=256)
+    slides.save(text)
+    assert binary.getvalue() == expected
+    assert text.getvalue().encode('utf-8') == expected
+    assert not (tmp_path / 'deck.html.part').exists()
+
+
+def test_figure_cache_skips_unchanged_matplotlib_figures(tmp_path):
+    matplotlib = pytest.importorskip('matplotlib')
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+
+    def make_figure(label):
+        figure = Figure()
+        figure.add_subplot().plot([1, 2, 3], [3, 1, 2], label=label)
+        return figure
+
+    cache = pyslides.FigureCache(str(tmp_path / 'figures'))
+    slides = pyslides.Slides(figure_cache=cache, defer_figures=True)
+    slides.add_slide(figure=make_figure('a'))
+    slides.add_slide(figure=make_figure('a'))
+    slides.add_slide(figure=make_figure('b'))
+    slides.convert_figures()
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert str(slides.slides[0]['figure']) == str(slides.slides[1]['figure'])
+
+    rebuilt = pyslides.Slides(figure_cache=cache, defer_figures=True)
+    rebuilt.add_slide(figure=make_figure('b'))
+    rebuilt.convert_figures()
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    uncached = pyslides.Slides()
+    uncached.add_slide(figure=make_figure('a'))
+    assert cache.stats()['entries'] == 2
+
+    key = pyslides.MatplotlibFigure(make_figure('a')).cache_key()
+    with matplotlib.rc_context({'savefig.facecolor': 'red'}):
+        assert pyslides.MatplotlibFigure(make_figure('a')).cache_key() != key
+
+
+def test_figure_cache_evicts_least_recently_used(tmp_path):
+    import os
+    cache = pyslides.FigureCache(str(tmp_path), max_bytes=250)
+    for mtime, key in [(100, 'aa1'), (200, 'bb2')]:
+        cache.put(key, 'x' * 100)
+        os.utime(tmp_path / key[:2] / key, (mtime, mtime))
+    assert cache.get('aa1') == 'x' * 100
+    cache.put('cc3', 'x' * 100)
+    assert cache.get('bb2') is None
+    assert cache.get('aa1') == cache.get('cc3') == 'x' * 100
+    assert cache.stats()['bytes'] <= 250
+
+
+def test_deferred_figures_convert_on_a_pool_in_slide_order():
+    matplotlib = pytest.importorskip('matplotlib')
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+
+    slides = pyslides.Slides(defer_figures=True, figure_cache=False)
+    for i in range(4):
+        figure = Figure()
+        figure.add_subplot().bar([0, 1], [i, i + 1])
+        slides.add_slide(title=f"Slide {i}", figure=figure)
+    expected = [pyslides.pyslides.convert_figure(slide['figure'].converter.figure)
+                for slide in slides.slides]
+
+    assert not any(slide['figure'].converted for slide in slides.slides)
+    slides.convert_figures(workers=2)
+    assert [str(slide['figure']) for slide in slides.slides] == expected
+
+
+def test_figure_conversion_failures_are_reported_per_slide():
+    matplotlib = pytest.importorskip('matplotlib')
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+
+    class BrokenFigure(Figure):
+        def savefig(self, *args, **kwargs):
+            raise RuntimeError('boom')
+
+    slides = pyslides.Slides(defer_figures=True)
+    slides.add_slide(figure=BrokenFigure())
+    slides.add_slide(figure='<p>ok</p>')
+    slides.add_slide(figure=BrokenFigure())
+    with pytest.raises(pyslides.FigureConversionError) as excinfo:
+        slides.convert_figures(workers=2, executor='thread')
+    assert sorted(excinfo.value.errors) == [0, 2]
+    assert str(slides.slides[1]['figure']) == '<p>ok</p>'
+
+
+def test_figures_are_converted_at_save_and_released(tmp_path, capsys):
+    matplotlib = pytest.importorskip('matplotlib')
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    # Eager by default: a redrawn figure gives one image per slide and stays open
+    plt.close('all')
+    eager = pyslides.Slides(figure_cache=False)
+    figure, ax = plt.subplots()
+    for i in range(3):
+        ax.clear()
+        ax.bar([0, 1], [i, i + 1])
+        eager.add_slide(figure=figure)
+    assert len({str(slide['figure']) for slide in eager.slides}) == 3
+    assert plt.get_fignums() == [figure.number]
+
+    plt.close('all')
+    slides = pyslides.Slides(defer_figures=True, release_figures=True)
+    figure, ax = plt.subplots()
+    ax.plot([1, 2, 3])
+    slides.add_slide(figure=figure)
+    ax.set_title('changed after add_slide')
+    for _ in range(3):
+        slides.add_slide(figure=plt.subplots()[0])
+    assert len(plt.get_fignums()) == 4
+    assert not slides.slides[0]['figure'].converted
+    slides.add_slide(figure=figure)
+    assert 'Warning: Figure' in capsys.readouterr().out
+
+    slides.save(str(tmp_path / 'deck.html'))
+    assert plt.get_fignums() == []
+    assert slides.slides[0]['figure'].converter is None
+    assert 'data:image/png;base64' in (tmp_path / 'deck.html').read_text()
+
+
+def test_sidecar_assets_are_deduplicated_files(tmp_path):
+    import base64
+    png = base64.b64encode(b'\x89PNG fake image').decode()
+    figure = f'<img src="data:image/png;base64,{png}" />'
+    slides = pyslides.Slides()
+    slides.add_slide(figure=figure)
+    slides.add_slide(figure=figure, layout='image-left', content=f'<img src=data:image/png;base64,{png} alt=logo>')
+
+    slides.save(str(tmp_path / 'deck.html'), assets='sidecar')
+    html = (tmp_path / 'deck.html').read_text()
+    files = list((tmp_path / 'deck_assets').iterdir())
+    assert len(files) == 1
+    assert files[0].read_bytes() == b'\x89PNG fake image'
+    assert html.count(f'src="deck_assets/{files[0].name}"') == 2
+    assert f'<img src=deck_assets/{files[0].name} alt=logo>' in html
+    assert 'base64' not in html
+
+
+def test_image_options_format_dpi_and_budget():
+    matplotlib = pytest.importorskip('matplotlib')
+    matplotlib.use('Agg')
+    import numpy as np
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(8, 4))
+    figure.add_subplot().imshow(np.random.default_rng(0).random((200, 200)))
+
+    auto = pyslides.MatplotlibFigure(figure, pyslides.ImageOptions(dpi='auto'), target_width=640)
+    assert auto.savefig_args()['dpi'] == 80
+
+    webp = pyslides.MatplotlibFigure(figure, pyslides.ImageOptions(format='webp', quality=90))
+    assert webp.to_html().startswith('<img src="data:image/webp;base64,')
+
+    full = len(pyslides.MatplotlibFigure(figure, pyslides.ImageOptions(format='jpeg')).to_image())
+    budget = pyslides.ImageOptions(format='jpeg', max_bytes=full // 3)
+    assert len(pyslides.MatplotlibFigure(figure, budget).to_image()) <= full // 3
+
+    slides = pyslides.Slides(image_options={'format': 'svg'}, config={'width': 1200}, defer_figures=True)
+    slides.add_slide(figure=figure, layout='image-right')
+    converter = slides.slides[0]['figure'].converter
+    assert converter.options.format == 'svg' and converter.target_width == 400
+
+
+def test_fragment_cache_rerenders_only_changed_slides(tmp_path):
+    def build(changed):
+        slides = pyslides.Slides(fragment_cache=cache)
+        for i in range(20):
+            slides.add_slide(title=f"Slide {i}", content=changed if i == 7 else "<p>same</p>")
+        return slides
+
+    cache = pyslides.FragmentCache(str(tmp_path / 'fragments'))
+    build('<p>v1</p>').save(str(tmp_path / 'first.html'))
+    assert cache.misses == 20
+
+    build('<p>v2</p>').save(str(tmp_path / 'second.html'))
+    assert (cache.hits, cache.misses) == (19, 21)
+    html = (tmp_path / 'second.html').read_text()
+    assert '<p>v2</p>' in html and html.count('<section') == 20
+
+    uncached = build('<p>v2</p>')
+    uncached.fragment_cache = False
+    uncached.save(str(tmp_path / 'third.html'))
+    assert (tmp_path / 'third.html').read_text() == html
+
+
+def test_build_command_builds_decks_and_reports_failures(tmp_path, capsys):
+    import json
+    from pyslides import cli
+    script = tmp_path / 'decks.py'
+    script.write_text(f'''
+import pyslides
+
+def customer_deck(name):
+    if name == 'broken':
+        raise RuntimeError('no data for ' + name)
+    slides = pyslides.Slides(title=name)
+    slides.add_slide(title=name, content='<p>Report</p>')
+    return slides
+
+def decks():
+    return [pyslides.DeckSpec(r"{tmp_path}/" + name + ".html", customer_deck, args=(name,))
+            for name in ['acme', 'broken', 'globex']]
+''')
+    status = cli.main(['build', str(script), '--workers', '2',
+                       '--report', str(tmp_path / 'report.json')])
+    assert status == 1
+    assert (tmp_path / 'acme.html').exists() and (tmp_path / 'globex.html').exists()
+    report = json.loads((tmp_path / 'report.json').read_text())
+    assert [entry['error'] is None for entry in report] == [True, False, True]
+    assert 'no data for broken' in report[1]['error']
+    assert '2/3 decks built' in capsys.readouterr().out
+
+
+def test_lazy_load_keeps_figures_inert_until_mounted(tmp_path):
+    figure = '<div id="chart"></div><script>Plotly.newPlot("chart", [])</script>'
+    eager = pyslides.Slides()
+    eager.add_slide(figure=figure)
+    lazy = pyslides.Slides(lazy_load=True)
+    lazy.add_slide(figure=figure)
+    eager.save(str(tmp_path / 'eager.html'))
+    lazy.save(str(tmp_path / 'lazy.html'))
+
+    eager_html = (tmp_path / 'eager.html').read_text()
+    lazy_html = (tmp_path / 'lazy.html').read_text()
+    assert f'<div>{figure}</div>' in eager_html and 'pyslides-lazy' not in eager_html
+    assert f'<div class="pyslides-lazy"><template>{figure}</template></div>' in lazy_html
+    assert "Reveal.on('slidechanged', update)" in lazy_html
+
+
+def test_plotly_reduction_downsamples_and_encodes_binary():
+    np = pytest.importorskip('numpy')
+    go = pytest.importorskip('plotly.graph_objects')
+    from pyslides.downsample import decode_array, reduce_figure
+
+    x = np.arange(200_000)
+    y = np.sin(x / 500.0)
+    y[123_457] = 50.0
+    figure = go.Figure(go.Scatter(x=x, y=y, text=[str(i) for i in x], mode='lines'))
+
+    for method in ['lttb', 'minmax']:
+        data = figure.to_plotly_json()
+        report = reduce_figure(data, max_points=2000, method=method, webgl_threshold=1000)
+        trace = data['data'][0]
+        kept = decode_array(trace['y'])
+        assert report.original == 200_000 and report.kept == len(kept) <= 2002
+        assert report.dropped == 200_000 - len(kept)
+        assert kept.max() == 50.0
+        assert trace['type'] == 'scattergl' and len(trace['text']) == len(kept)
+        assert set(trace['x']) == {'dtype', 'bdata'}
+
+    converter = pyslides.PlotlyFigure(figure, pyslides.PlotlyOptions(max_points=1000))
+    html = converter.to_html()
+    assert converter.report.kept <= 1000 and 'bdata' in html and html.startswith('<!-- pyslides: downsampled')
+
+    # Time axes stay ISO dates, with or without downsampling
+    dates = np.datetime64('2024-01-01T00:00', 'ns') + np.arange(5000) * np.timedelta64(1, 'm')
+    timeline = go.Figure(go.Scatter(x=dates, y=np.cos(np.arange(5000) / 50.0)))
+    for options in [pyslides.PlotlyOptions(), pyslides.PlotlyOptions(max_points=500)]:
+        html = pyslides.PlotlyFigure(timeline, options).to_html()
+        assert '"x":["2024-01-01T00:00:00"' in html and '"2024-01-04T11:19:00"' in html
+
+
+def test_heavy_artists_are_rasterised_in_svg_output():
+    matplotlib = pytest.importorskip('matplotlib')
+    matplotlib.use('Agg')
+    import numpy as np
+    from matplotlib.figure import Figure
+
+    figure = Figure()
+    ax = figure.add_subplot()
+    ax.scatter(*np.random.default_rng(0).random((2, 20_000)))
+    ax.plot([0, 1], [0, 1])
+    ax.set_title('dense')
+
+    vector = pyslides.MatplotlibFigure(figure, pyslides.ImageOptions(format='svg', rasterize_threshold=None))
+    mixed = pyslides.MatplotlibFigure(figure, pyslides.ImageOptions(format='svg'))
+    svg, mixed_svg = vector.to_image(), mixed.to_image()
+    assert len(mixed_svg) < len(svg) / 5
+    assert b'<image' in mixed_svg and b'id="xtick_1"' in mixed_svg
+    assert not any(artist.get_rasterized() for artist in ax.collections)
+
+    fallback = pyslides.ImageOptions(format='svg', vector_max_complexity=10_000)
+    assert pyslides.MatplotlibFigure(figure, fallback).to_html().startswith(
+        '<img src="data:image/png;base64,')
+
+
+def test_offline_bundles_read_vendored_runtime_and_skip_unused_plugins(tmp_path):
+    from pyslides.bundle import runtime_assets
+
+    vendor = tmp_path / 'vendor'
+    everything = {'plotly', 'mathjax', 'highlight', 'notes', 'zoom', 'search'}
+    for asset in runtime_assets('black', everything, offline=True):
+        path = vendor / asset.vendor_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        body = '/* comment */ .x { color : red ; }' if asset.kind == 'css' else f'var {asset.name}="</script>";'
+        path.write_text(body)
+
+    slides = pyslides.Slides(title='Offline')
+    slides.add_slide(title='Prices', content='<p>It costs $5 and $10</p>')
+    assert 'mathjax' not in slides.runtime_features()
+    slides.add_slide(title='Math', content='<p>$e^{i\\pi} = -1$</p>')
+    assert 'mathjax' in slides.runtime_features()
+    with pytest.raises(FileNotFoundError):
+        slides.save(str(tmp_path / 'missing.html'), bundle='inline', vendor_dir=str(tmp_path / 'empty'))
+
+    slides.save(str(tmp_path / 'inline.html'), bundle='inline', vendor_dir=str(vendor))
+    html = (tmp_path / 'inline.html').read_text()
+    assert 'https://' not in html and '.x{color:red}' in html
+    assert 'var mathjax="<\\/script>"' in html and 'var plotly' not in html
+    assert html.index('window.MathJax') < html.index('var mathjax')
+    assert 'RevealZoom, RevealSearch' in html and 'RevealNotes' not in html
+
+    for name in ('a', 'b'):
+        slides.save(str(tmp_path / f'{name}.html'), bundle='sidecar', vendor_dir=str(vendor),
+                    assets_dir=str(tmp_path / 'shared'))
+    assert (tmp_path / 'a.html').read_text() == (tmp_path / 'b.html').read_text()
+    assert len(list((tmp_path / 'shared').iterdir())) == 7
+    assert 'cdn.jsdelivr.net' in slides._template_context()['runtime']['styles'][0]['href']
+
+
+def test_sharded_save_writes_one_file_per_chapter(tmp_path):
+    slides = pyslides.Slides(title='Training')
+    slides.add_slide(title='Welcome')
+    for chapter in range(1, 3):
+        slides.add_chapter(f'Part {chapter}')
+        for index in range(3):
+            slides.add_slide(title=f'part {chapter} slide {index}')
+    assert slides.chapter_ranges() == [(None, 0, 1), ('Part 1', 1, 4), ('Part 2', 4, 7)]
+
+    slides.save(str(tmp_path / 'deck.html'), shard=True)
+    shell = (tmp_path / 'deck.html').read_text()
+    chapters = sorted((tmp_path / 'deck_assets').glob('chapter-*.html'))
+    assert [path.name.split('.')[0] for path in chapters] == ['chapter-1', 'chapter-2']
+    assert 'Welcome' in shell and 'part 1 slide 0' not in shell
+    assert shell.count('<section data-pyslides-chapter="deck_assets/chapter-1.') == 3
+    assert chapters[1].read_text().count('<section') == 3
+    assert 'part 2 slide 2' in chapters[1].read_text()
+
+
+def test_precompressed_output_and_packed_payloads(tmp_path):
+    import base64
+    import gzip
+    go = pytest.importorskip('plotly.graph_objects')
+
+    figure = go.Figure(go.Scatter(x=list(range(2000)), y=[i % 7 for i in range(2000)]))
+    slides = pyslides.Slides(compress_payloads=True, plotly_options=dict(binary=False))
+    slides.add_slide(title='Packed', figure=figure)
+    slides.add_slide(title='Small', content='<p>tiny</p>')
+
+    output = tmp_path / 'deck.html'
+    slides.save(str(output), precompress=True, shard=False)
+    html = output.read_text()
+    assert gzip.decompress((tmp_path / 'deck.html.gz').read_bytes()).decode() == html
+    assert not list(tmp_path.glob('*.part'))
+    writers = [pyslides.assets.CompressedWriter(str(output), ['gzip']) for _ in range(2)]
+    assert len(set(writers[0]._partials + writers[1]._partials)) == 4
+    for writer in writers:
+        writer.discard()
+
+    packed = html.split('data-packed="')[1].split('"')[0]
+    assert 'Plotly.newPlot' in gzip.decompress(base64.b64decode(packed)).decode()
+    assert html.count('data-packed=') == 1 and 'DecompressionStream' in html
+
+    # Matplotlib SVG packs too, unless sidecar mode moves the image out
+    matplotlib = pytest.importorskip('matplotlib')
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    svg = Figure()
+    svg.add_subplot().plot([i % 13 for i in range(500)])
+    slides = pyslides.Slides(compress_payloads=True, image_options=dict(format='svg'))
+    slides.add_slide(title='Vector', figure=svg)
+    assert 'data-packed=' in slides.to_html() and 'image/svg+xml' not in slides.to_html()
+    slides.save(str(output), assets='sidecar')
+    assert 'data-packed=' not in output.read_text() and list(tmp_path.glob('deck_assets/*.svg'))
+
+    with pytest.raises(ValueError):
+        slides.save(str(output), precompress='zstd')
+
+
+def test_dev_server_patches_changed_slides_and_serves_the_deck(tmp_path):
+    import urllib.request
+    from pyslides.server import DevServer
+
+    script = tmp_path / 'deck.py'
+    source = ("import pyslides\n"
+              "slides = pyslides.Slides(title='Live')\n"
+              "for i in range(3):\n"
+              "    slides.add_slide(title=f'slide {i} {VERSION}' if i == 1 else f'slide {i}')\n"
+              "slides.save('deck.html')\n")
+    script.write_text("VERSION = 'one'\n" + source)
+
+    server = DevServer(str(script), port=0)
+    events = []
+    server.broadcast = lambda event, data: events.append((event, data))
+    server.start()
+    try:
+        assert not (tmp_path / 'deck.html').exists()
+        with urllib.request.urlopen(f'http://127.0.0.1:{server.port}/') as response:
+            html = response.read().decode()
+        assert 'slide 1 one' in html and 'EventSource' in html
+
+        script.write_text("VERSION = 'two'\n" + source)
+        assert server.build()
+        event, data = events[-1]
+        assert event == 'patch' and list(json.loads(data)['slides']) == ['1']
+
+        script.write_text("VERSION = 'two'\n" + source.replace("'Live'", "'Renamed'"))
+        assert server.build() and events[-1][0] == 'reload'
+    finally:
+        server.stop()
+
+
+def test_dump_load_and_merge_decks_without_regenerating(tmp_path):
+    go = pytest.importorskip('plotly.graph_objects')
+    from pyslides.store import BlobFigure
+
+    def part(name):
+        slides = pyslides.Slides(title=name, theme='white')
+        slides.add_chapter(f'{name} intro')
+        slides.add_slide(title=f'{name} chart', figure=go.Figure(go.Bar(y=[1, 2, 3])))
+        slides.add_slide(title=f'{name} text', content='<p>same</p>', vertical=True)
+        return slides
+
+    original = part('A')
+    original.save(str(tmp_path / 'original.html'))
+    original.dump(str(tmp_path / 'A.deck'))
+    part('B').dump(str(tmp_path / 'B.deck'))
+    assert len(list((tmp_path / 'A.deck' / 'blobs').iterdir())) == 1
+
+    loaded = pyslides.Slides.load(str(tmp_path / 'A.deck'))
+    assert isinstance(loaded.slides[0]['figure'], BlobFigure) and loaded.theme == 'white'
+    loaded.save(str(tmp_path / 'loaded.html'))
+    assert (tmp_path / 'loaded.html').read_text() == (tmp_path / 'original.html').read_text()
+
+    merged = pyslides.Slides.merge([str(tmp_path / 'A.deck'), str(tmp_path / 'B.deck')], title='Both')
+    assert [s['title'] for s in merged.slides] == ['A chart', 'A text', 'B chart', 'B text']
+    assert merged.chapter_ranges() == [('A intro', 0, 2), ('B intro', 2, 4)]
+    merged.dump(str(tmp_path / 'merged.deck'))
+    assert pyslides.Slides.load(str(tmp_path / 'merged.deck')).header['title'] == 'Both'
+
+
+def test_slides_are_slotted_validated_and_dict_compatible():
+    slides = pyslides.Slides()
+    slides.add_slide(title='Welcome', layout='title', author='Me')
+    slides.add_slide(title='Columns', layout='two-column', content_left='L', content_right='R')
+    title, columns = slides.slides
+    assert isinstance(title, pyslides.TitleSlide) and isinstance(columns, pyslides.TwoColumnSlide)
+    assert not hasattr(title, '__dict__')
+
+    assert title['author'] == 'Me' and title.get('subtitle') is None and title.subtitle is None
+    assert 'author' in title and 'notes' not in title
+    assert dict(columns) == {'layout': 'two-column', 'title': 'Columns',
+                             'content_left': 'L', 'content_right': 'R'}
+    with pytest.raises(KeyError):
+        title['notes']
+    assert title.setdefault('notes', 'Say hi') == 'Say hi' and title.setdefault('notes', 'x') == 'Say hi'
+    columns.update({'layout': 'two-column', 'content_left': 'Left'}, notes='n')
+    assert columns.pop('content_left') == 'Left' and columns.pop('content_left', None) is None
+    assert 'content_left' not in columns and columns.notes == 'n'
+
+    with pytest.raises(ValueError, match='two-columns'):
+        slides.add_slide(layout='two-columns')
+    with pytest.raises(TypeError, match='content_left'):
+        slides.add_slide(title='Typo', content_left='lost')
+    with pytest.raises(TypeError):
+        title['figure'] = '<div></div>'
+    assert len(slides.slides) == 2
+
+    # Plain dicts appended to ``slides.slides`` still render
+    slides.optimize_backgrounds = True
+    slides.slides.append({'layout': 'default', 'title': 'Legacy', 'background': '#123456'})
+    assert '<h2 >Legacy</h2>' in slides.to_html() and slides.stats().slides[2].title == 'Legacy'
+
+
+def test_build_trace_records_phases_slide_sizes_and_exports(tmp_path):
+    slides = pyslides.Slides(fragment_cache=False)
+    slides.add_slide(title='Small', content='<p>a</p>')
+    slides.add_slide(title='Large', content='<p>' + 'b' * 5000 + '</p>')
+    spans = []
+
+    other = pyslides.Slides(fragment_cache=False)
+    other.add_slide(title='Other', content='<p>c</p>')
+    deck = str(tmp_path / 'deck.html')
+
+    with pyslides.trace_build(on_span=spans.append) as trace:
+        slides.save(deck, precompress='gzip')
+        other.save(str(tmp_path / 'other.html'))
+    slides.save(str(tmp_path / 'untraced.html'))
+
+    assert {'convert figures', 'resolve runtime', 'render and write'} <= set(trace.phases())
+    assert spans == trace.spans and [s.args['slide'] for s in spans if s.name == 'render slide'] == [0, 1, 0]
+    assert trace.slides[deck, 1]['bytes'] > 5000 > trace.slides[deck, 0]['bytes'] > 0
+    assert trace.slides[deck, 0]['title'] == 'Small' and trace.slides[str(tmp_path / 'other.html'), 0]['title'] == 'Other'
+    assert len(trace.slides) == 3
+    assert trace.outputs[str(tmp_path / 'deck.html')] == (tmp_path / 'deck.html').stat().st_size
+    assert str(tmp_path / 'deck.html.gz') in trace.outputs and 'Large' in trace.summary()
+
+    trace.save(str(tmp_path / 'trace.json'))
+    trace.save_chrome(str(tmp_path / 'chrome.json'))
+    assert json.loads((tmp_path / 'trace.json').read_text())['slides'][1]['title'] == 'Large'
+    events = json.loads((tmp_path / 'chrome.json').read_text())['traceEvents']
+    assert {'ph', 'ts', 'dur', 'pid', 'tid'} <= set(events[0]) and len(trace.spans) == len(events) - 1
+
+
+def test_pdf_exporter_pools_pages_and_waits_for_readiness(tmp_path, fake_browser):
+    from pyslides.export import export_pdfs
+
+    decks = []
+    for name in ['A', 'B', 'Broken', 'C', 'D']:
+        deck = pyslides.Slides()
+        deck.add_slide(title=name)
+        decks.append((deck, str(tmp_path / f'{name}.pdf')))
+
+    backend = fake_browser()
+    results = export_pdfs(decks, pages=2, backend=backend)
+    assert [r.ok for r in results] == [True, True, False, True, True] and 'print failed' in results[2].error
+    assert all("view: 'print'" in html for html in backend.documents)
+    assert (tmp_path / 'C.pdf').read_bytes() == b'%PDF-C' and not list(tmp_path.glob('*.html'))
+    assert backend.starts == 1 and backend.peak == 2 and backend.pages <= 3
+
+    decks[0][0].export_pdf(str(tmp_path / 'single.pdf'), exporter=pyslides.export.PDFExporter(backend=fake_browser()))
+    assert (tmp_path / 'single.pdf').read_bytes() == b'%PDF-A'
+
+    # Relative paths resolve next to the PDF, as for a deck saved there, and
+    # nothing outside that directory is served
+    (tmp_path / 'pdf' / 'figures').mkdir(parents=True)
+    (tmp_path / 'pdf' / 'figures' / 'plot.png').write_bytes(b'png')
+    (tmp_path / 'secret.png').write_bytes(b'png')
+    deck = pyslides.Slides()
+    deck.add_slide(title='Figure', content='<img src="figures/plot.png"><img src="figures/missing.png">'
+                                           '<img src="../secret.png">')
+    backend = fake_browser()
+    deck.export_pdf(str(tmp_path / 'pdf' / 'figure.pdf'), exporter=pyslides.export.PDFExporter(backend=backend))
+    assert backend.loaded == {'figures/plot.png': 200, 'figures/missing.png': 404, '../secret.png': 404}
+    assert [path.name for path in (tmp_path / 'pdf').iterdir() if path.is_file()] == ['figure.pdf']
+
+
+def test_export_images_captures_changed_slides_with_thumbnails(tmp_path, fake_browser):
+    from PIL import Image
+    from pyslides.export import ImageExporter
+
+    slides = pyslides.Slides(config={'width': 800, 'height': 450})
+    for title in ['One', 'Two', 'Three']:
+        slides.add_slide(title=title)
+
+    def export(indices=None):
+        backend = fake_browser()
+        exporter = ImageExporter(backend=backend, pages=2, thumbnail_width=80)
+        return slides.export_images(str(tmp_path), indices, exporter=exporter), backend
+
+    with pyslides.pyslides.capture_saves() as decks:
+        images, backend = export()
+    assert decks == [slides] and images == [] and backend.starts == 0 and not list(tmp_path.glob('*.png'))
+
+    images, backend = export()
+    assert sorted(backend.captured) == [0, 1, 2] and not any(image.skipped for image in images)
+    assert all('controls: false' in html and "view: 'print'" not in html for html in backend.documents)
+    assert Image.open(images[0].path).size == (800, 450) and Image.open(images[0].thumbnail).size == (80, 45)
+
+    images, backend = export()
+    assert all(image.skipped for image in images) and backend.starts == 0
+
+    slides.slides[1].title = 'Two, edited'
+    images, backend = export([1, 2])
+    assert backend.captured == [1] and [image.skipped for image in images] == [False, True]
+    assert len(list(tmp_path.glob('slide-002-*'))) == 2  # image and thumbnail, old ones removed
+
+
+def test_stats_break_down_sizes_and_budgets_warn_or_fail(tmp_path, capsys):
+    image = '<img src="data:image/png;base64,' + 'A' * 20000 + '">'
+    chart = '<div id="c"></div><script>Plotly.newPlot("c", [' + '1,' * 5000 + '1])</script>'
+    slides = pyslides.Slides(custom_css='h2 { color: red; }')
+    slides.add_slide(title='Heatmap', figure=image, notes='Say something')
+    slides.add_slide(title='Trace', content='<p>Intro</p>', figure=chart)
+
+    stats = slides.stats()
+    assert stats.by_type['image'] > 20000 and stats.by_type['plotly'] > 10000 and stats.by_type['css'] == 18
+    assert stats.slides[0].fields['notes'] == len('Say something') and stats.slides[1].types['html'] == 30
+    assert stats.by_field['figure'] == stats.slides[0].figures['figure'] + stats.slides[1].figures['figure']
+    assert stats.largest(1)[0].title == 'Heatmap' and 'mostly image' in stats.summary()
+
+    output = tmp_path / 'deck.html'
+    slides.save(str(output), budget=pyslides.SizeBudget(max_figure=15000))
+    assert 'Warning: Slide 0' in capsys.readouterr().out and output.exists()
+
+    before = output.read_text()
+    slides.budget = pyslides.SizeBudget(max_total=20000, action='error')
+    with pytest.raises(pyslides.BudgetExceededError, match='total budget'):
+        slides.save(str(output))
+    assert output.read_text() == before and not list(tmp_path.glob('*.part'))
+    with pytest.raises(ValueError):
+        pyslides.SizeBudget(action='ignore')
+
+    # Budgets count bytes, also for text streams
+    import io
+    accents = pyslides.Slides()
+    accents.add_slide(title='Café', content='é' * 6000)
+    stream = io.StringIO()
+    accents.save(stream)
+    budget = pyslides.SizeBudget(max_total=len(stream.getvalue()) + 100, action='error')
+    with pytest.raises(pyslides.BudgetExceededError):
+        accents.save(io.StringIO(), budget=budget)
+
+
+def test_background_images_are_resized_cached_and_stored_once(tmp_path):
+    import base64
+    import io
+    from PIL import Image
+
+    photo = tmp_path / 'photo.jpg'
+    Image.new('RGB', (4000, 3000), (200, 80, 40)).save(photo, quality=95)
+    logo = tmp_path / 'logo.svg'
+    logo.write_text('<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"/>')
+    animation = tmp_path / 'spinner.gif'
+    frames = [Image.new('RGB', (2000, 2000), colour) for colour in ('red', 'blue')]
+    frames[0].save(animation, save_all=True, append_images=frames[1:])
+    cache = pyslides.BackgroundCache(str(tmp_path / 'backgrounds'))
+    pyslides.set_background_cache(cache)
+
+    slides = pyslides.Slides(config={'width': 800, 'height': 450}, optimize_backgrounds=True)
+    slides.add_slide(title='One', background=str(photo))
+    slides.add_slide(title='Two', background=str(photo))
+    slides.add_slide(title='Colour', background='#123456')
+    slides.add_slide(title='Logo', background=str(logo))
+    slides.add_slide(title='Spinner', background=str(animation))
+    slides.save(str(tmp_path / 'deck.html'))
+    html = (tmp_path / 'deck.html').read_text()
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert html.count('data:image/webp;base64,') == 1 and html.count('data-pyslides-background=') == 2
+    assert 'data-background="#123456"' in html and f'background="{photo}"' not in html
+    assert f'data-background="{logo}"' in html and f'data-background="{animation}"' in html
+
+    encoded = html.split('data:image/webp;base64,')[1].split('"')[0]
+    with Image.open(io.BytesIO(base64.b64decode(encoded))) as image:
+        assert (image.format, image.size) == ('WEBP', (800, 600))
+
+    slides.save(str(tmp_path / 'sidecar.html'), assets='sidecar')
+    assert cache.hits == 2 and len(list((tmp_path / 'sidecar_assets').glob('*.webp'))) == 1
+    assert '<link rel="preload" as="image"' in (tmp_path / 'sidecar.html').read_text()
+
+    # Relative paths resolve from the saved HTML's directory, not the working directory
+    relative = pyslides.Slides(config={'width': 800, 'height': 450}, optimize_backgrounds=True)
+    relative.add_slide(title='One', background='../photo.jpg')
+    (tmp_path / 'out').mkdir()
+    relative.save(str(tmp_path / 'out' / 'deck.html'))
+    assert 'data:image/webp;base64,' in (tmp_path / 'out' / 'deck.html').read_text()